@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+
+import argparse
+from collections import namedtuple
+import contextlib
+import io
+import json
+import numpy as np
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import wordle_stats
+
+
+Benchmark = namedtuple('Benchmark', ['name', 'unit', 'prepare'])
+Dataset = namedtuple('Dataset', ['name', 'word_length', 'answers', 'guesses'])
+
+
+# Global Configuration
+BASE_ALPHABET = wordle_stats.ALPHABET  # extended for each dataset with any other letters that it uses
+BASELINE_FILE = None
+COLOURED_OUTPUT = True
+LETTERS_BY_FREQUENCY = 'earotlisncuydhpmgbfkwvzxqj'  # as in the real answers, used to make synthetic words
+OUTPUT_FILE = 'benchmark_results.json'
+FEEDBACK_CHECK_SIZE = 100  # guesses and answers, whose feedback is checked before benchmarking each dataset
+PAIR_SAMPLE_SIZE = 20000
+QUICK = False
+REPEATS = 3
+SEED = 2022
+SWEEP_CHECK_RANGE = (0.0, 4.0)  # green multipliers swept before benchmarking each dataset, to check the segments
+SYNTHETIC_DATASETS = [
+    # word length, number of answers, number of (extra) legal guesses, included in quick runs, letters beyond a to z
+    (4, 500, 2000, True, ''),
+    (5, 500, 2000, True, ''),
+    (6, 500, 2000, True, ''),
+    (5, 500, 2000, True, 'áéíñóúü'),
+    (5, 2000, 10000, False, ''),
+]
+TOLERANCE = 0.1
+TOP_GUESS_QUERIES = 200
+WORDLIST_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args(argv):
+    global BASELINE_FILE, COLOURED_OUTPUT, OUTPUT_FILE, QUICK, REPEATS, SEED, TOLERANCE
+    parser = argparse.ArgumentParser(
+        prog='wordle_benchmarks',
+        description='benchmark the scoring, cache, search and reporting hot paths of wordle_stats'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        default=OUTPUT_FILE,
+        help=f"file to save the results in, as JSON (default = {OUTPUT_FILE})",
+    )
+    parser.add_argument(
+        '-b', '--baseline',
+        default=BASELINE_FILE,
+        help="results saved by an earlier run to compare against",
+    )
+    parser.add_argument(
+        '-t', '--tolerance',
+        default=TOLERANCE,
+        type=float,
+        help=f"fraction by which a benchmark may be slower than the baseline before it counts as a regression " +
+                f"(default = {TOLERANCE})",
+    )
+    parser.add_argument(
+        '-r', '--repeats',
+        default=REPEATS,
+        type=int,
+        help=f"number of times to run each benchmark, keeping the fastest (default = {REPEATS})",
+    )
+    parser.add_argument(
+        '-s', '--seed',
+        default=SEED,
+        type=int,
+        help=f"seed for the synthetic wordlists and samples (default = {SEED})",
+    )
+    parser.add_argument(
+        '-q', '--quick',
+        action='store_true',
+        help='only use the smaller synthetic wordlists (and not the real ones)',
+    )
+    parser.add_argument(
+        '-C', '--no-colours',
+        action='store_true',
+        help='do not use coloured output',
+    )
+    args = parser.parse_args(argv)
+    BASELINE_FILE = args.baseline
+    COLOURED_OUTPUT = not args.no_colours
+    OUTPUT_FILE = args.output
+    QUICK = args.quick
+    REPEATS = args.repeats
+    SEED = args.seed
+    TOLERANCE = args.tolerance
+    wordle_stats.COLOURED_OUTPUT = COLOURED_OUTPUT
+    return args
+
+
+def make_synthetic_words(rng, word_length, count, exclude=(), extra_letters=''):
+    '''
+    Make distinct random words, with letters chosen roughly as often as they occur in real words
+    (and any extra letters chosen least often).
+    '''
+    letters = LETTERS_BY_FREQUENCY + extra_letters
+    weights = [1 / (rank + 1) for rank in range(len(letters))]
+    words = set()
+    exclude = set(exclude)
+    while len(words) < count:
+        word = ''.join(rng.choices(letters, weights, k=word_length))
+        if word not in exclude:
+            words.add(word)
+    return sorted(words)
+
+
+def get_datasets():
+    '''
+    Build the wordlists to benchmark with: synthetic wordlists of several sizes and word lengths
+    (the same every time for the same seed), and the real wordlists.
+    '''
+    datasets = []
+    for word_length, num_answers, num_guesses, quick, extra_letters in SYNTHETIC_DATASETS:
+        if QUICK and not quick:
+            continue
+        rng = random.Random(f"{SEED}-{word_length}-{num_answers}-{num_guesses}{extra_letters}")
+        answers = make_synthetic_words(rng, word_length, num_answers, extra_letters=extra_letters)
+        guesses = make_synthetic_words(rng, word_length, num_guesses, exclude=answers,
+                extra_letters=extra_letters) + answers
+        name = f"{'accented' if extra_letters else 'synthetic'}-{word_length}x{num_answers}x{num_guesses}"
+        datasets.append(Dataset(name, word_length, answers, guesses))
+    if not QUICK:
+        answers = list(wordle_stats.read_wordlist(os.path.join(WORDLIST_DIRECTORY, wordle_stats.ANSWERS_WORDLIST_FILE)))
+        guesses = list(wordle_stats.read_wordlist(
+                os.path.join(WORDLIST_DIRECTORY, wordle_stats.LEGAL_GUESSES_WORDLIST_FILE))) + answers
+        datasets.append(Dataset('real', wordle_stats.WORD_LENGTH, answers, guesses))
+    return datasets
+
+
+def select_dataset(dataset):
+    '''
+    Configure wordle_stats for the word length and letters of a dataset.
+    '''
+    wordle_stats.WORD_LENGTH = dataset.word_length
+    wordle_stats.ALPHABET = BASE_ALPHABET
+    wordle_stats.ALPHABET = wordle_stats.get_alphabet(dataset.guesses)
+
+
+@contextlib.contextmanager
+def temporary_cache_directory():
+    '''
+    Cache the scores of wordle_stats in a new temporary directory (without a legacy cache), removed afterwards.
+    '''
+    cache_directory = tempfile.mkdtemp(prefix='wordle_benchmarks_')
+    wordle_stats.CACHE_DIRECTORY = cache_directory
+    wordle_stats.EXPECTED_GUESS_SCORES_CACHE_FILE = os.path.join(cache_directory, 'no_legacy_cache.txt')
+    try:
+        yield cache_directory
+    finally:
+        shutil.rmtree(cache_directory, ignore_errors=True)
+
+
+def check_feedback(dataset):
+    '''
+    Check that the feedback matrix for a sample of the guesses and answers in a dataset matches the feedback
+    from get_specific_guess_score for each pair of words, so that every dataset (including those with letters
+    beyond a to z) is known to be scored correctly before it is benchmarked.
+
+    Returns the pairs of words whose feedback does not match.
+    '''
+    select_dataset(dataset)
+    rng = random.Random(SEED)
+    guesses = rng.sample(dataset.guesses, min(FEEDBACK_CHECK_SIZE, len(dataset.guesses)))
+    answers = rng.sample(dataset.answers, min(FEEDBACK_CHECK_SIZE, len(dataset.answers)))
+    patterns = wordle_stats.get_feedback_matrix(wordle_stats.encode_words(guesses), wordle_stats.encode_words(answers))
+    return [(guess_word, answer_word) for i, guess_word in enumerate(guesses) for j, answer_word in enumerate(answers)
+            if wordle_stats.decode_feedback(patterns[i, j]) !=
+                    wordle_stats.get_specific_guess_score(guess_word, answer_word)]
+
+
+def check_partitions(dataset):
+    '''
+    Check that the partitions of the answers exported for a sample of guesses (see iter_partition_rows) match the
+    answers with each feedback pattern for each guess on its own. The answers are those without any letters of
+    the first guess, so that every answer gives it the same pattern, which is also the first pattern of the next
+    guess in the same block (where the groups of the two guesses meet).
+
+    Returns the guesses whose partitions do not match.
+    '''
+    select_dataset(dataset)
+    rng = random.Random(SEED)
+    guesses = rng.sample(dataset.guesses, min(FEEDBACK_CHECK_SIZE, len(dataset.guesses)))
+    answers = [answer_word for answer_word in dataset.answers if not set(answer_word) & set(guesses[0])]
+    patterns = wordle_stats.get_feedback_matrix(wordle_stats.encode_words(guesses), wordle_stats.encode_words(answers))
+    partitions = {}
+    for guess_id, pattern, num_answers, group_answers in wordle_stats.iter_partition_rows(
+            patterns.T, np.arange(len(guesses)), answers):
+        partitions.setdefault(guesses[guess_id], []).append((pattern, num_answers, json.loads(group_answers)))
+    mismatches = []
+    for guess_word, guess_patterns in zip(guesses, patterns.tolist()):
+        groups = {}
+        for answer_word, pattern in zip(answers, guess_patterns):
+            groups.setdefault(pattern, []).append(answer_word)
+        expected = [(pattern, len(groups[pattern]), groups[pattern]) for pattern in sorted(groups)]
+        if partitions.get(guess_word) != expected:
+            mismatches.append(guess_word)
+    return mismatches
+
+
+def check_sweep(dataset):
+    '''
+    Check that sweeping the green multiplier over SWEEP_CHECK_RANGE (see get_sweep_rows) gives no ranges too narrow
+    to tell apart from a single multiplier, and no range with the same top and ideal guesses as the one before it,
+    as rounding errors where several guesses cross at almost the same multiplier could leave behind.
+
+    Returns the ranges (as pairs of multipliers) that are too narrow or the same as the one before them.
+    '''
+    select_dataset(dataset)
+    with temporary_cache_directory():
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected_guess_scores = wordle_stats.get_all_expected_guess_scores(dataset.guesses, dataset.answers)
+        rows = wordle_stats.get_sweep_rows(expected_guess_scores, SWEEP_CHECK_RANGE)
+    return [(float(start), float(end))
+            for (start, end, top_guesses, ideal_guesses), previous in zip(rows, [None] + rows[:-1])
+            if end - start <= wordle_stats.SWEEP_EPSILON or
+                    previous is not None and previous[2:] == (top_guesses, ideal_guesses)]
+
+
+# Each benchmark is prepared for a dataset by a function that returns the function to time, which in turn
+# returns the amount of work it did (in the units of the benchmark). Scores are cached in the given directory.
+def prepare_specific_guess_score(dataset, cache_directory):
+    rng = random.Random(SEED)
+    pairs = [(rng.choice(dataset.guesses), rng.choice(dataset.answers)) for _ in range(PAIR_SAMPLE_SIZE)]
+    def run():
+        for guess_word, answer_word in pairs:
+            wordle_stats.get_specific_guess_score(guess_word, answer_word)
+        return len(pairs)
+    return run
+
+
+def prepare_expected_guess_score(dataset, cache_directory):
+    guesses = random.Random(SEED).sample(dataset.guesses, 20)
+    def run():
+        for guess_word in guesses:
+            wordle_stats.get_expected_guess_score(guess_word, dataset.answers)
+        return len(guesses) * len(dataset.answers)
+    return run
+
+
+def prepare_hit_counts(dataset, cache_directory):
+    guess_codes = wordle_stats.encode_words(dataset.guesses)
+    answer_codes = wordle_stats.encode_words(dataset.answers)
+    def run():
+        wordle_stats.get_hit_counts(guess_codes, answer_codes)
+        return len(guess_codes) * len(answer_codes)
+    return run
+
+
+def prepare_cache_build(dataset, cache_directory):
+    def run():
+        shutil.rmtree(cache_directory, ignore_errors=True)
+        wordle_stats.get_all_expected_guess_scores(dataset.guesses, dataset.answers)
+        return len(dataset.guesses) * len(dataset.answers)
+    return run
+
+
+def prepare_cache_load(dataset, cache_directory):
+    wordle_stats.get_all_expected_guess_scores(dataset.guesses, dataset.answers)
+    def run():
+        wordle_stats.get_all_expected_guess_scores(dataset.guesses, dataset.answers)
+        return len(dataset.guesses)
+    return run
+
+
+def prepare_score_table_load(dataset, cache_directory):
+    wordle_stats.load_score_table(dataset.guesses, dataset.answers)
+    def run():
+        wordle_stats.build_guess_index(wordle_stats.load_score_table(dataset.guesses, dataset.answers))
+        return len(dataset.guesses)
+    return run
+
+
+def prepare_ideal_weighted_guess_scores(dataset, cache_directory):
+    expected_guess_scores = wordle_stats.get_all_expected_guess_scores(dataset.guesses, dataset.answers)
+    def run():
+        wordle_stats.get_ideal_weighted_guess_scores(expected_guess_scores)
+        return len(expected_guess_scores)
+    return run
+
+
+def prepare_top_guesses(dataset, cache_directory):
+    expected_guess_scores = wordle_stats.get_all_expected_guess_scores(dataset.guesses, dataset.answers)
+    index = wordle_stats.build_guess_index(expected_guess_scores)
+    rng = random.Random(SEED)
+    excluded_masks = [wordle_stats.get_letters_mask(''.join(rng.sample(dataset.guesses, rng.randint(0, 3))))
+            for _ in range(TOP_GUESS_QUERIES)]
+    def run():
+        for excluded_mask in excluded_masks:
+            for ordering in wordle_stats.GUESS_ORDERINGS:
+                wordle_stats.find_top_guesses(index, ordering, wordle_stats.PRINTING_NUM_WORDS, excluded_mask,
+                        max_duplicates=0)
+        return len(excluded_masks) * len(wordle_stats.GUESS_ORDERINGS)
+    return run
+
+
+def prepare_optimal_guess_combinations(dataset, cache_directory):
+    expected_guess_scores = wordle_stats.get_all_expected_guess_scores(dataset.guesses, dataset.answers)
+    num_guesses = min(3, len(wordle_stats.ALPHABET) // dataset.word_length)
+    def run():
+        _, _, _, visited, _ = wordle_stats.find_optimal_guess_combinations(
+                expected_guess_scores, wordle_stats.ALPHABET, num_guesses)
+        return visited
+    return run
+
+
+BENCHMARKS = [
+    Benchmark('get_specific_guess_score', 'pairs/s', prepare_specific_guess_score),
+    Benchmark('get_expected_guess_score', 'pairs/s', prepare_expected_guess_score),
+    Benchmark('get_hit_counts', 'pairs/s', prepare_hit_counts),
+    Benchmark('cache_build', 'pairs/s', prepare_cache_build),
+    Benchmark('cache_load', 'guesses/s', prepare_cache_load),
+    Benchmark('score_table_load', 'guesses/s', prepare_score_table_load),
+    Benchmark('get_ideal_weighted_guess_scores', 'guesses/s', prepare_ideal_weighted_guess_scores),
+    Benchmark('find_top_guesses', 'queries/s', prepare_top_guesses),
+    Benchmark('find_optimal_guess_combinations', 'combinations/s', prepare_optimal_guess_combinations),
+]
+
+
+def run_benchmark(benchmark, dataset):
+    '''
+    Run a benchmark on a dataset, several times, and measure the fastest run.
+
+    Peak memory is measured in one further run (with tracemalloc, which would otherwise slow down the timed runs).
+    Returns the measurements as a dictionary.
+    '''
+    select_dataset(dataset)
+    with temporary_cache_directory() as cache_directory:
+        # the functions being measured report their progress, which is not of interest here
+        with contextlib.redirect_stdout(io.StringIO()):
+            run = benchmark.prepare(dataset, cache_directory)
+            best = None
+            for _ in range(REPEATS):
+                wall_start, cpu_start = time.perf_counter(), time.process_time()
+                work = run()
+                wall_time, cpu_time = time.perf_counter() - wall_start, time.process_time() - cpu_start
+                if best is None or wall_time < best[0]:
+                    best = (wall_time, cpu_time, work)
+            tracemalloc.start()
+            run()
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    wall_time, cpu_time, work = best
+    return {
+        'benchmark': benchmark.name,
+        'dataset': dataset.name,
+        'word_length': dataset.word_length,
+        'num_answers': len(dataset.answers),
+        'num_guesses': len(dataset.guesses),
+        'wall_time': wall_time,
+        'cpu_time': cpu_time,
+        'peak_memory': peak_memory,
+        'work': work,
+        'throughput': work / wall_time if wall_time > 0 else None,
+        'unit': benchmark.unit,
+    }
+
+
+def format_result(result):
+    '''
+    Format the measurements from a benchmark for display.
+    '''
+    throughput = f"{result['throughput']:>14,.0f} {result['unit']:<15}" if result['throughput'] else ' ' * 30
+    return f"{result['benchmark']:<34}{result['dataset']:<24}{throughput}" + \
+            f"{1000 * result['wall_time']:>10.1f} ms {result['peak_memory'] / 2 ** 20:>9.1f} MiB"
+
+
+def compare_results(results, baseline):
+    '''
+    Compare results against a baseline, displaying the change in wall time and peak memory for each benchmark.
+
+    Returns the number of benchmarks that are slower than the baseline by more than the tolerance.
+    '''
+    baseline_results = {(result['benchmark'], result['dataset']): result for result in baseline['results']}
+    num_regressions = 0
+    print(wordle_stats.coloured(f"\nComparison with baseline from {baseline['metadata']['timestamp']}",
+            attrs=['bold']))
+    for result in results:
+        previous = baseline_results.get((result['benchmark'], result['dataset']))
+        if previous is None:
+            continue
+        time_change = result['wall_time'] / previous['wall_time'] - 1
+        memory_change = result['peak_memory'] / previous['peak_memory'] - 1 if previous['peak_memory'] else 0
+        colour = 'red' if time_change > TOLERANCE else 'green' if time_change < -TOLERANCE else None
+        num_regressions += time_change > TOLERANCE
+        print(f"{result['benchmark']:<34}{result['dataset']:<24}" +
+                wordle_stats.coloured(f"{100 * time_change:>+8.1f}% time", colour) +
+                f" {100 * memory_change:>+8.1f}% memory")
+    return num_regressions
+
+
+def main():
+    parse_args(sys.argv[1:])
+    print(wordle_stats.coloured("Wordle Statistics Benchmarks.", 'green', attrs=['bold']))
+    metadata = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'seed': SEED,
+        'repeats': REPEATS,
+        'quick': QUICK,
+    }
+    results = []
+    for dataset in get_datasets():
+        print(wordle_stats.coloured(f"\n{dataset.name} ({len(dataset.answers)} answers, {len(dataset.guesses)} " +
+                f"guesses of {dataset.word_length} letters)", attrs=['bold']))
+        mismatches = check_feedback(dataset)
+        if mismatches:
+            print(wordle_stats.coloured(f"{len(mismatches)} pairs of words are scored incorrectly, such as " +
+                    f"'{mismatches[0][0]}' for '{mismatches[0][1]}'", 'red', attrs=['bold']))
+            sys.exit(1)
+        mismatches = check_partitions(dataset)
+        if mismatches:
+            print(wordle_stats.coloured(f"{len(mismatches)} guesses partition the answers incorrectly, such as " +
+                    f"'{mismatches[0]}'", 'red', attrs=['bold']))
+            sys.exit(1)
+        segments = check_sweep(dataset)
+        if segments:
+            print(wordle_stats.coloured(f"{len(segments)} ranges of green multipliers are empty or repeat the one " +
+                    f"before them, such as {segments[0][0]} to {segments[0][1]}", 'red', attrs=['bold']))
+            sys.exit(1)
+        for benchmark in BENCHMARKS:
+            results.append(run_benchmark(benchmark, dataset))
+            print(format_result(results[-1]))
+    with open(OUTPUT_FILE, 'w') as out:
+        json.dump({'metadata': metadata, 'results': results}, out, indent=2)
+    print(f"\nSaved results to '{OUTPUT_FILE}'")
+    if BASELINE_FILE:
+        with open(BASELINE_FILE, 'r') as f:
+            baseline = json.load(f)
+        num_regressions = compare_results(results, baseline)
+        if num_regressions > 0:
+            print(wordle_stats.coloured(f"{num_regressions} benchmarks are more than {100 * TOLERANCE:0.0f}% slower " +
+                    "than the baseline", 'red', attrs=['bold']))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
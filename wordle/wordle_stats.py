@@ -1,35 +1,164 @@
 #!/usr/bin/env python3
 
 import argparse
-from collections import Counter, namedtuple
-import colorama
-from itertools import combinations
+from bisect import bisect_left, bisect_right
+from collections import Counter, deque, namedtuple
+from contextlib import contextmanager, nullcontext, redirect_stdout
+from functools import lru_cache, reduce
+import hashlib
+import importlib.util
+import io
+from itertools import combinations, islice, product, repeat
+import json
 import math
-from operator import attrgetter, itemgetter
+import mmap
+from operator import attrgetter, itemgetter, or_
 import os
+import struct
 import sys
-import termcolor
+import threading
+import time
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
 
 
-ExpectedScore = namedtuple('ExpectedScore', ['word', 'greens', 'yellows', 'total'])
+def import_lazily(name):
+    '''
+    Import a module that is only loaded once one of its attributes is first used (unless it is already loaded).
+    '''
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# a report from the cached scores never uses numpy, so that it does not have to wait for numpy to load
+np = import_lazily('numpy')
+
+
+CandidateIndex = namedtuple('CandidateIndex', ['size', 'all', 'positions', 'counts'])
+DecisionTreeSearch = namedtuple('DecisionTreeSearch',
+        ['patterns', 'guess_indices', 'answer_guesses', 'answer_positions', 'width', 'memo'])
+ExpectedScore = namedtuple('ExpectedScore',
+        ['word', 'greens', 'yellows', 'total', 'entropy', 'expected_remaining', 'max_bucket'],
+        defaults=[None, None, None])
+GuessIndex = namedtuple('GuessIndex', ['guesses', 'scores', 'masks', 'num_letters', 'orderings'])
+ScoreTable = namedtuple('ScoreTable',
+        ['words', 'codes', 'greens', 'yellows', 'total', 'entropy', 'expected_remaining', 'max_bucket'],
+        defaults=[None, None, None])
+ServerData = namedtuple('ServerData', ['answers', 'expected_guess_scores', 'scores_by_word', 'letter_freqs',
+        'guess_index', 'answer_flags', 'solver'])
+Simulation = namedtuple('Simulation',
+        ['patterns', 'pattern_hits', 'allowed', 'answer_guesses', 'openers', 'strategy', 'memo'])
+Solver = namedtuple('Solver', ['index', 'patterns', 'hit_counts'])
 
 
 # Global Configuration
 ALPHABET = 'abcdefghijklmnopqrstuvwxyz'
 ANSWERS_WORDLIST_FILE = 'wordlist_answers.txt'
+BATCH_BLOCK_SIZE = 2048
+BATCH_FILE = None
+BATCH_FORMAT = 'csv'
+BATCH_SCORE_CACHE_SIZE = 4096
+BUILD_CHUNK_SIZE = 1024
+CACHE_DIRECTORY = 'score_cache'
+CACHE_FORMAT_VERSION = 1
+CACHE_MAGIC = b'WRDLSTAT'
+CACHE_WRITE_BLOCK_SIZE = 64 * 2 ** 20  # bytes of an array written to a cache file at once
 COLOURED_OUTPUT = True
-EXPECTED_GUESS_SCORES_CACHE_FILE = 'expected_guess_scores_cache.txt'
+COUNT_BLOCK_SIZE = 64  # guesses whose feedback patterns are counted at once
+CPROFILE_FILE = None
+DECISION_TREE_PAIR_LIMIT = 32
+DECISION_TREE_WIDTH = 10
+EXPECTED_GUESS_SCORES_CACHE_FILE = 'expected_guess_scores_cache.txt'  # legacy text format, converted on first use
+EXPORT_BLOCK_SIZE = 256  # guesses whose partitions are exported at once
+EXPORT_SQLITE_FILE = None
+FEEDBACK_BLOCK_SIZE = 256
+FEEDBACK_MIN_TILE_GUESSES = 32
+GAMES_CSV_FILE = None
 GREEN_MULTIPLIER = 2
+JOBS = 1
+JOINT_BLOCK_SIZE = 256
 LEGAL_GUESSES_WORDLIST_FILE = 'wordlist_guesses.txt'
+LETTER_PRICE_DECAY = 0.98  # how much each step of choosing the -O letter prices shrinks by
+LETTER_PRICE_ITERATIONS = 300
+LETTER_PRICE_STEP = 0.1  # the first step of choosing the -O letter prices, as a share of the best score per letter
+MAX_GUESSES = 6  # games that need more guesses than this are failures
 MAX_DUPLICATE_GUESS_LETTERS = 0
+MEMORY_LIMIT = None  # in MiB, or None to calculate each block of feedback patterns against every answer at once
+METRIC = 'weighted'
+METRICS_JSON_FILE = None
+METRICS = {
+    # name: (description, format for values)
+    'weighted': ('Weighted Score', '{:0.2f}'),
+    'entropy': ('Entropy', '{:0.3f} bits'),
+    'expected-remaining': ('Expected Remaining', '{:0.1f} left'),
+    'max-bucket': ('Largest Bucket', '{:d} left'),
+}
+PAIR_SEARCH_LIMIT = 1024
+NUM_OPTIMAL_GUESSES = None
+NUM_OPTIMAL_RESULTS = 1
 PLANNED_GUESSES = []
 PRINTING_BLOCK_SIZE = 5
 PRINTING_NUM_WORDS = 15
+PROFILE = False
+SERVER_ADDRESS = None
+SERVER_THREADS = 8
+SIMULATION_CHUNKS_PER_JOB = 4
+SIMULATION_SAMPLE = None
+SIMULATION_SEED = 0
+SIMULATION_STRATEGY = None
+SWEEP_CSV_FILE = None
+SWEEP_EPSILON = 1e-9
+SWEEP_MULTIPLIERS = None
+SCORING_VERSION = 1  # increment whenever the way scores are calculated changes, to invalidate cached scores
 WORD_LENGTH = 5
 
 
+def parse_multipliers(text):
+    '''
+    Parse the green multipliers to sweep: either a range ('low:high'), as a pair, or a list ('a,b,c').
+    '''
+    try:
+        if ':' in text:
+            low, high = (float(value) for value in text.split(':'))
+            if not 0 <= low < high:
+                raise ValueError
+            return (low, high)
+        multipliers = [float(value) for value in text.split(',')]
+        if min(multipliers) < 0:
+            raise ValueError
+        return multipliers
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a range ('low:high') or list ('a,b,c') of multipliers " +
+                "that are not negative")
+
+
+def parse_positive_int(text):
+    '''
+    Parse a count that must be at least 1.
+    '''
+    try:
+        value = int(text)
+        if value < 1:
+            raise ValueError
+        return value
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a whole number of at least 1")
+
+
 def parse_args(argv):
-    global COLOURED_OUTPUT, GREEN_MULTIPLIER, MAX_DUPLICATE_GUESS_LETTERS, PLANNED_GUESSES, WORD_LENGTH
+    global BATCH_FILE, BATCH_FORMAT, COLOURED_OUTPUT, CPROFILE_FILE, DECISION_TREE_WIDTH, EXPORT_SQLITE_FILE
+    global GAMES_CSV_FILE, GREEN_MULTIPLIER, JOBS, MAX_DUPLICATE_GUESS_LETTERS, MEMORY_LIMIT, METRIC, METRICS_JSON_FILE
+    global NUM_OPTIMAL_GUESSES, NUM_OPTIMAL_RESULTS, PLANNED_GUESSES, PROFILE, SERVER_ADDRESS, SIMULATION_SAMPLE
+    global SIMULATION_STRATEGY, SWEEP_CSV_FILE, SWEEP_MULTIPLIERS, WORD_LENGTH
     parser = argparse.ArgumentParser(
         prog='wordle_stats',
         description='compute some basic wordle statistics'
@@ -52,6 +181,27 @@ def parse_args(argv):
         type=float,
         help=f"how many yellows a green should count as (default = {float(GREEN_MULTIPLIER) : 0.1f})"
     )
+    parser.add_argument(
+        '--sweep',
+        default=SWEEP_MULTIPLIERS,
+        type=parse_multipliers,
+        metavar='MULTIPLIERS',
+        help="show how the top guesses and ideal guesses by weighted score change with the green multiplier, " +
+                "over a range ('1:4', giving every point where they change) or at a list of multipliers ('1,2,3')",
+    )
+    parser.add_argument(
+        '--sweep-csv',
+        default=SWEEP_CSV_FILE,
+        metavar='PATH',
+        help="save the results of --sweep as CSV",
+    )
+    parser.add_argument(
+        '-m', '--metric',
+        default=METRIC,
+        choices=list(METRICS),
+        help="how to rank guesses: by weighted score, by the entropy of their feedback, or by the expected " +
+                f"or largest number of answers remaining after them (default = {METRIC})",
+    )
     parser.add_argument(
         '-a', '--only-guess-answers',
         action='store_true',
@@ -62,40 +212,279 @@ def parse_args(argv):
         action='store_true',
         help='do not use coloured output',
     )
+    parser.add_argument(
+        '-j', '--jobs',
+        default=JOBS,
+        type=int,
+        help=f"number of processes used to calculate scores, or 0 for one per CPU (default = {JOBS})",
+    )
+    parser.add_argument(
+        '-M', '--memory-limit',
+        default=MEMORY_LIMIT,
+        type=int,
+        metavar='MIB',
+        help="calculate scores in tiles of guesses and answers that fit within this much memory (in MiB, " +
+                "shared between the jobs), keeping large tables in memory-mapped files (default = no limit)",
+    )
+    parser.add_argument(
+        '-S', '--solve',
+        action='store_true',
+        help="solve a puzzle from guesses given as 'guess:feedback' (with G for green, y for yellow and . for " +
+                "a miss, e.g. 'crane:..yG.'), or entered interactively if none are given",
+    )
+    parser.add_argument(
+        '-T', '--decision-tree',
+        action='store_true',
+        help="build a decision tree that solves every answer, starting with the first planned guess " +
+                "(default = the best guess by the chosen metric)",
+    )
+    parser.add_argument(
+        '-W', '--tree-width',
+        default=DECISION_TREE_WIDTH,
+        type=parse_positive_int,
+        help=f"number of guesses considered at each step of the decision tree (default = {DECISION_TREE_WIDTH})",
+    )
+    parser.add_argument(
+        '-G', '--simulate',
+        nargs='?',
+        const='best',
+        default=SIMULATION_STRATEGY,
+        choices=['best', 'candidates'],
+        metavar='STRATEGY',
+        help="play a game for every answer, opening with the planned guesses and then playing the best guess " +
+                "by the chosen metric ('best', the default) or the best of the remaining candidate answers " +
+                "('candidates'), and show how many guesses they needed",
+    )
+    parser.add_argument(
+        '--sample',
+        default=SIMULATION_SAMPLE,
+        type=parse_positive_int,
+        metavar='N',
+        help="with -G, only play the games for a random sample of this many answers (always the same sample)",
+    )
+    parser.add_argument(
+        '--games-csv',
+        default=GAMES_CSV_FILE,
+        metavar='PATH',
+        help="save the guesses made in every game played with -G as CSV",
+    )
+    parser.add_argument(
+        '-B', '--batch',
+        default=BATCH_FILE,
+        metavar='FILE',
+        help="evaluate sequences of planned guesses read from a file ('-' for standard input), one sequence per " +
+                "line, writing the results to standard output in the order they were read",
+    )
+    parser.add_argument(
+        '--batch-format',
+        default=BATCH_FORMAT,
+        choices=['csv', 'jsonl'],
+        help=f"format of the results of -B, as CSV or JSON lines (default = {BATCH_FORMAT})",
+    )
+    parser.add_argument(
+        '--export-sqlite',
+        default=EXPORT_SQLITE_FILE,
+        metavar='PATH',
+        help="export the words, their expected scores and the letter frequencies of the answers to an indexed " +
+                "SQLite database, rewriting only the tables whose data has changed since the last export",
+    )
+    parser.add_argument(
+        '--export-partitions',
+        action='store_true',
+        help="with --export-sqlite, also export the partition scores of every guess, the number of answers " +
+                "giving each feedback pattern for it, and which answers they are",
+    )
     parser.add_argument(
         '-O', '--seek-optimal-guesses',
         action='store_true',
         help='seek for optimal guesses (using the guess letters provided)',
     )
+    parser.add_argument(
+        '-J', '--joint',
+        action='store_true',
+        help="with -O, rerank the best combinations of guesses by how well they split the answers into groups " +
+                "together (use -k to rerank more of them)",
+    )
+    parser.add_argument(
+        '-n', '--num-optimal-guesses',
+        default=NUM_OPTIMAL_GUESSES,
+        type=parse_positive_int,
+        help="number of guesses to seek with -O (default = as many as the allowed letters permit)",
+    )
+    parser.add_argument(
+        '-k', '--num-optimal-results',
+        default=NUM_OPTIMAL_RESULTS,
+        type=parse_positive_int,
+        help=f"number of the best combinations of guesses to show with -O (default = {NUM_OPTIMAL_RESULTS})",
+    )
+    parser.add_argument(
+        '--serve',
+        nargs='?',
+        const='-',
+        default=SERVER_ADDRESS,
+        metavar='ADDRESS',
+        help="keep the word data and scores loaded, and answer queries sent as JSON lines on standard input " +
+                "(by default), on a local TCP port ('host:port') or on a Unix socket (a path)",
+    )
+    parser.add_argument(
+        '-P', '--profile',
+        action='store_true',
+        help='show the time and memory used by each phase of the run, and counts of the work done',
+    )
+    parser.add_argument(
+        '--metrics-json',
+        default=METRICS_JSON_FILE,
+        metavar='PATH',
+        help='save the time and memory used by each phase of the run, and counts of the work done, as JSON',
+    )
+    parser.add_argument(
+        '--cprofile',
+        default=CPROFILE_FILE,
+        metavar='PATH',
+        help='save cProfile statistics for the whole run (for use with pstats)',
+    )
     planned_guesses_string = "'" + "', '".join(PLANNED_GUESSES or []) + "'"
     parser.add_argument(
         'planned_guesses',
         action='store',
         type=str,
         nargs='*',
-        help="possible guesses to evaluate " +
+        help="possible guesses to evaluate, or guesses with their feedback to solve from (with -S) " +
                 (f"(default = {planned_guesses_string})" if PLANNED_GUESSES and len(PLANNED_GUESSES) > 0 else '')
     )
     args = parser.parse_args(argv)
+    BATCH_FILE = args.batch
+    BATCH_FORMAT = args.batch_format
     COLOURED_OUTPUT = not args.no_colours
+    CPROFILE_FILE = args.cprofile
+    DECISION_TREE_WIDTH = args.tree_width
+    EXPORT_SQLITE_FILE = args.export_sqlite
+    GAMES_CSV_FILE = args.games_csv
     GREEN_MULTIPLIER = args.green_multiplier
+    JOBS = args.jobs if args.jobs > 0 else os.cpu_count()
     MAX_DUPLICATE_GUESS_LETTERS = args.max_duplicates
+    MEMORY_LIMIT = args.memory_limit
+    METRIC = args.metric
+    METRICS_JSON_FILE = args.metrics_json
+    NUM_OPTIMAL_GUESSES = args.num_optimal_guesses
+    NUM_OPTIMAL_RESULTS = args.num_optimal_results
     PLANNED_GUESSES = args.planned_guesses
+    PROFILE = args.profile
+    SERVER_ADDRESS = args.serve
+    SIMULATION_SAMPLE = args.sample
+    SIMULATION_STRATEGY = args.simulate
+    SWEEP_CSV_FILE = args.sweep_csv
+    SWEEP_MULTIPLIERS = args.sweep
     WORD_LENGTH = args.word_length
     if COLOURED_OUTPUT:
+        # colorama and termcolor are only imported when they are needed, as importing them slows down startup
+        import colorama
         colorama.init()
     if PLANNED_GUESSES and len(PLANNED_GUESSES) == 0:
         PLANNED_GUESSES = None    
+    if args.seek_optimal_guesses and PLANNED_GUESSES:
+        # the letters allowed by -O are those of the planned guesses, in any case
+        PLANNED_GUESSES = [guess.lower() for guess in PLANNED_GUESSES]
+        letters = set(''.join(PLANNED_GUESSES))
+        if not all(letter.isalpha() for letter in letters):
+            parser.error("-O letters must be letters, not " +
+                    f"'{''.join(sorted(letter for letter in letters if not letter.isalpha()))}'")
+        if len(letters) < WORD_LENGTH:
+            parser.error(f"-O needs at least {WORD_LENGTH} different letters for a guess, not {len(letters)}")
     return args
     
 
 def coloured(string, *args, **kwargs):
     if COLOURED_OUTPUT:
+        import termcolor
         return termcolor.colored(string, *args, **kwargs)
     else:
         return string
 
 
+# the phases of the current run measured so far (see measure_phase), and counts of the work done on its hot paths
+# (see count_work), which are locked as the server counts its work from several threads at once
+RUN_PHASES = []
+RUN_COUNTERS = Counter()
+RUN_COUNTERS_LOCK = threading.Lock()
+
+
+def count_work(name, amount=1):
+    '''
+    Add to the count of some work done in this run (see RUN_COUNTERS), from any thread.
+    '''
+    with RUN_COUNTERS_LOCK:
+        RUN_COUNTERS[name] += amount
+
+
+def get_cpu_time():
+    '''
+    Get the CPU time used so far by this process, and by any worker processes that have finished.
+    '''
+    cpu_time = time.process_time()
+    if resource:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu_time += children.ru_utime + children.ru_stime
+    return cpu_time
+
+
+def get_peak_memory():
+    '''
+    Get the most memory (in bytes) this process has used so far, or None where this is not available.
+    '''
+    if not resource:
+        return None
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_memory if sys.platform == 'darwin' else peak_memory * 1024
+
+
+@contextmanager
+def measure_phase(name):
+    '''
+    Measure the wall time, CPU time and peak memory of a phase of the run.
+
+    Peak memory is the most memory used by the process up to the end of the phase, so it only increases
+    from one phase to the next. Measuring a phase costs a few microseconds, so phases are always measured.
+    '''
+    wall_start, cpu_start = time.perf_counter(), get_cpu_time()
+    try:
+        yield
+    finally:
+        RUN_PHASES.append({'phase': name, 'wall_time': time.perf_counter() - wall_start,
+                'cpu_time': get_cpu_time() - cpu_start, 'peak_memory': get_peak_memory()})
+
+
+def report_run_metrics(wall_time, cpu_time):
+    '''
+    Display (with --profile) and/or save (with --metrics-json) the measurements of each phase of the run,
+    and the counts of the work done.
+    '''
+    with RUN_COUNTERS_LOCK:
+        counters = dict(RUN_COUNTERS)
+    if PROFILE:
+        def format_memory(memory):
+            return f"{memory / 2 ** 20:>9.1f} MiB" if memory is not None else ' ' * 13
+        print(coloured("\nProfile", attrs=['bold']))
+        print(f"{'Phase':<28}{'Wall':>11}{'CPU':>11}{'Peak Memory':>14}")
+        for phase in RUN_PHASES + [{'phase': 'total', 'wall_time': wall_time, 'cpu_time': cpu_time,
+                'peak_memory': get_peak_memory()}]:
+            print(f"{phase['phase']:<28}{1000 * phase['wall_time']:>8.1f} ms{1000 * phase['cpu_time']:>8.1f} ms" +
+                    format_memory(phase['peak_memory']))
+        for name, count in sorted(counters.items()):
+            print(f"{name.replace('_', ' ').capitalize() + ':':<28}{count:>11}")
+    if METRICS_JSON_FILE:
+        metrics = {
+            'argv': sys.argv[1:],
+            'wall_time': wall_time,
+            'cpu_time': cpu_time,
+            'peak_memory': get_peak_memory(),
+            'phases': RUN_PHASES,
+            'counters': counters,
+        }
+        with open(METRICS_JSON_FILE, 'w') as out:
+            json.dump(metrics, out, indent=2)
+
+
 def read_wordlist(filename):
     '''
     Read words from a file.
@@ -104,23 +493,31 @@ def read_wordlist(filename):
     Only words of length WORD_LENGTH will be returned. All letters will be converted to lower case.
     '''
     with open(filename, 'r') as f:
-        lines = f.readlines()
-        return (word.strip().lower() for line in lines for word in line.split(',') if len(word.strip()) == WORD_LENGTH)
+        for line in f:
+            for word in line.split(','):
+                word = word.strip()
+                if len(word) == WORD_LENGTH:
+                    yield word.lower()
 
 
-def get_letter_log_freqs(words, position=None):
+def get_letter_log_freqs(words):
     '''
-    Calculate the log frequency of letters in the list of words,
-        either in any position, or in a specific position within the word.
+    Calculate the log frequency of letters in the list of words, in any position and in each specific position
+    within the word.
     
     Duplicate words are ignored and will not effect the calculation of letter frequencies.
+    Returns a list of dictionaries from letter to log frequency: the first for any position, followed by one for
+    each position, with the letters in alphabet order. The letters in every position are counted together, in a
+    single pass over the words (without numpy, as the report needs nothing else from it).
     '''
-    counts = Counter(
-        letter for word in set(words) for pos, letter in enumerate(word)
-        if pos == position or position == None
-    )
-    log_total = math.log(sum(counts.values()))
-    return {letter: math.log(count) - log_total for letter, count in counts.items()}
+    position_counts = Counter((position, letter) for word in set(words) for position, letter in enumerate(word))
+    counts = [[position_counts[position, letter] for letter in ALPHABET] for position in range(WORD_LENGTH)]
+    letter_freqs = []
+    for letter_counts in [[sum(column) for column in zip(*counts)], *counts]:
+        log_total = math.log(max(1, sum(letter_counts)))
+        letter_freqs.append({letter: math.log(count) - log_total
+                for letter, count in zip(ALPHABET, letter_counts) if count > 0})
+    return letter_freqs
 
 
 def get_specific_guess_score(guess_word, answer_word):
@@ -131,6 +528,7 @@ def get_specific_guess_score(guess_word, answer_word):
     and the total number of green and yellow tiles that the guess would receive
     (independent of position).
     '''
+    count_work('pairs_scored')
     guess_word = list(guess_word)
     answer_word = list(answer_word)
     result = ['.'] * WORD_LENGTH
@@ -150,328 +548,3038 @@ def get_specific_guess_score(guess_word, answer_word):
     return ''.join(result)
 
 
-def get_expected_guess_score(guess_word, answers):
+def get_alphabet(words):
     '''
-    Calculate the expected score of a guess word relative to all the possible answer words.
+    Find the alphabet needed to encode the words: the letters already in ALPHABET (a to z, to begin with), followed
+    by any other letters that the words use, in order. The codes of the letters already in ALPHABET stay the same.
+    
+    Letter masks (see get_letter_masks) are 64-bit integers, so at most 63 letters are supported.
     '''
-    greens = 0
-    yellows = 0
-    for answer_word in answers:
-        score = Counter(get_specific_guess_score(guess_word, answer_word))
-        greens += score['G']
-        yellows += score['y']
-    return ExpectedScore(guess_word, greens / len(answers), yellows / len(answers), (greens + yellows) / len(answers))
+    alphabet = ALPHABET + ''.join(sorted(set(''.join(words)) - set(ALPHABET)))
+    if len(alphabet) > 63:
+        raise ValueError(f"the words use {len(alphabet)} different letters, but at most 63 are supported")
+    return alphabet
 
 
-def get_all_expected_guess_scores(guesses, answers):
+def encode_words(words):
     '''
-    Calculate the expected scores of every legal guess.
-    
-    This calculation can take some time. Once calculated, the scores as saved in a cache file for future use.
-    If this cache files is present, the scores will be loaded from it instead of recalculated on subsequent runs.
+    Encode words as an array of letter indices (in ALPHABET), with one row per word and one column per position.
     '''
-    filename = EXPECTED_GUESS_SCORES_CACHE_FILE
-    expected_guess_scores = []
-    if os.path.exists(filename):
-        print(f"Loading expected guess scores from '{filename}' (delete this file to recalculate)")
-        with open(filename, 'r') as f:
-            for line in f.readlines():
-                fields = [f.strip() for f in line.split(',')]
-                exp = ExpectedScore(fields[0], float(fields[1]), float(fields[2]), float(fields[3]))
-                expected_guess_scores.append(exp)
-    else:
-        with open(filename + '~', 'w') as out:
-            print(f"Calculating expected guess scores (saving to '{filename}')")
-            one_percent = int(len(guesses) / 100)
-            for idx, guess_word in enumerate(guesses):
-                if idx % one_percent == 0:
-                    sys.stdout.write(f"{int(idx / one_percent)}% ")
-                    sys.stdout.flush()
-                exp = get_expected_guess_score(guess_word, answers)
-                out.write(f"{exp.word}, {exp.greens}, {exp.yellows}, {exp.total}\n")
-                expected_guess_scores.append(exp)
-        os.rename(filename + '~', filename)
-    return expected_guess_scores
+    words = list(words)
+    if len(words) == 0:
+        return np.zeros((0, WORD_LENGTH), dtype=np.uint8)
+    letters = np.frombuffer(''.join(words).encode('utf-32-le'), dtype=np.uint32)
+    alphabet = np.array([ord(letter) for letter in ALPHABET], dtype=np.uint32)
+    # look up the code of each letter by its code point, with every other code point (up to the largest letter)
+    # mapped to an invalid code
+    codes = np.full(int(alphabet.max()) + 2, len(ALPHABET), dtype=np.uint8)
+    codes[alphabet] = np.arange(len(ALPHABET))
+    letters = codes[np.minimum(letters, len(codes) - 1)]
+    if (letters == len(ALPHABET)).any():
+        for word in words:
+            for letter in word:
+                if letter not in ALPHABET:
+                    raise ValueError(f"word '{word}' uses the letter '{letter}', which is not in the alphabet")
+    return letters.reshape(len(words), -1)
 
 
-def get_weighted_score(guess):
+def decode_words(codes, alphabet=None):
     '''
-    Calculate the weighted score for a guess (given it's expected green and yellow scores).
+    Convert an array of encoded words (as returned by encode_words) back into a list of words, using the alphabet
+    they were encoded with (ALPHABET by default).
     '''
-    return guess.greens * GREEN_MULTIPLIER + guess.yellows
+    if len(codes) == 0:
+        return []
+    word_length = codes.shape[1]
+    alphabet = np.array([ord(letter) for letter in alphabet or ALPHABET], dtype=np.uint32)
+    letters = alphabet[np.asarray(codes)].tobytes().decode('utf-32-le')
+    return [letters[i:i + word_length] for i in range(0, len(letters), word_length)]
 
 
-def get_ideal_weighted_guess_scores(expected_guess_scores):
+def get_letter_masks(codes):
     '''
-    Calculate the sequence of 'ideal' guesses that maximize the total weighted score at each step
-    and do not repeat letters from previous guesses. All legal guesses are considered.
+    Calculate a bit mask of the letters used in each encoded word (with bit i set if the i-th letter is used).
     '''
-    letters_used = set()
-    best_guesses = []
-    while True:
-        top_scores = sorted(
-                (guess for guess in expected_guess_scores if len(set(guess.word).intersection(letters_used)) == 0),
-                key=get_weighted_score, reverse=True)
-        if len(top_scores) == 0:
-            break
-        best_guesses.append(top_scores[0])
-        for letter in top_scores[0].word:
-            letters_used.add(letter)
-    return best_guesses
-    
+    if len(codes) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.bitwise_or.reduce(np.left_shift(1, codes.astype(np.int64)), axis=1)
+
 
-def seek_optimal_guesses_within_constraints(expected_guess_scores, allowed_letters, limit_guesses_to=None):
+def get_letters_mask(letters):
     '''
-    Try to determine what the optimal guesses would be within the given constraints.
-    
-    Guesses must use all of the allowed letters, without duplicating letters
+    Calculate the bit mask of a set of letters (with bit i set if the i-th letter of the alphabet is included).
     '''
-    do_not_warn = False
-    if allowed_letters == '':
-        allowed_letters = ALPHABET
-        do_not_warn = True
-    allowed_letters = set(allowed_letters)
-    print(coloured(f"\nSeeking optimal guesses using letters " + \
-            f"{' '.join(l.upper() for l in sorted(allowed_letters))}", attrs=['bold']))
-    if len(allowed_letters) % WORD_LENGTH != 0 and not do_not_warn:
-        print(coloured(
-                "WARNING: The set of allowed letters is not evenly divisible by the word length",
-                'red', attrs=['bold']))
-    num_guesses = int(len(allowed_letters) / WORD_LENGTH)
+    letters = set(letters.lower())
+    if not letters <= set(ALPHABET):
+        raise ValueError(f"letters '{''.join(sorted(letters - set(ALPHABET)))}' are not in the alphabet")
+    return sum(1 << ALPHABET.index(letter) for letter in letters)
 
-    # filter possible guesses to include only words that use only the required letters and have no duplicates
-    possible_guesses = expected_guess_scores
-    if limit_guesses_to:
-        limit_guesses_to = set(limit_guesses_to)
-        possible_guesses = [guess for guess in possible_guesses if guess.word in limit_guesses_to]
-    possible_guesses = [guess for guess in possible_guesses
-            if len(allowed_letters.intersection(set(guess.word))) == WORD_LENGTH]
-    possible_guesses = sorted(possible_guesses, key=get_weighted_score, reverse=True)
-    possible_guesses = [(set(g.word), g) for g in possible_guesses] # precompute letter sets for each guess
-    print(f"Considering {len(possible_guesses)} possible guesses")
-
-    best_combo_2 = None
-    best_score_2 = 0
-    letters_used_2 = set()
-    best_combo_3 = None
-    best_score_3 = 0
-    letters_used_3 = set()
-    need_line_break = False
-    for idx, guess_data_1 in enumerate(possible_guesses):
-        set1, guess1 = guess_data_1
-        if idx % 10 == 0:
-            if need_line_break:
-                need_line_break = False
-                sys.stdout.write("\n")
-            sys.stdout.write(f"{(100 * idx / len(possible_guesses)):0.2f}% ")
-            sys.stdout.flush()
-        weighted_score_1 = get_weighted_score(guess1)
-        for set2, guess2 in possible_guesses:
-            if len(set1.intersection(set2)) > 0:
-                continue
-            weighted_score_2 = get_weighted_score(guess2)
-            total_weighted_score_2 = weighted_score_1 + weighted_score_2
-            if total_weighted_score_2 > best_score_2:
-                best_combo_2 = (guess1, guess2)
-                best_score_2 = total_weighted_score_2
-                sys.stdout.write(coloured(f"\n{' '.join(g.word for g in best_combo_2)}: " + \
-                        f"{total_weighted_score_2:0.6f}", attrs=['bold']))
-                sys.stdout.flush()
-                need_line_break = True
-            
-            set12 = set1.union(set2)
-            for set3, guess3 in possible_guesses:
-                if len(set12.intersection(set3)) > 0:
-                    continue
-                weighted_score_3 = get_weighted_score(guess3)
-                total_weighted_score_3 = weighted_score_1 + weighted_score_2 + weighted_score_3
-                if total_weighted_score_3 > best_score_3:
-                    best_combo_3 = (guess1, guess2, guess3)
-                    best_score_3 = total_weighted_score_3
-                    sys.stdout.write(coloured(f"\n{' '.join(g.word for g in best_combo_3)}: " + \
-                            f"{total_weighted_score_2:0.6f} -> {total_weighted_score_3:0.6f}", attrs=['bold']))
-                    sys.stdout.flush()
-                    need_line_break = True
-    print('')
-    result = best_combo_3 if best_combo_3 is not None else best_combo_2
-    if result is None:
+
+def get_feedback_dtype(word_length):
+    '''
+    Determine the smallest unsigned integer type that can hold every feedback pattern code.
+    '''
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if 3 ** word_length <= np.iinfo(dtype).max + 1:
+            return dtype
+    raise ValueError(f"word length {word_length} is too long to encode feedback patterns")
+
+
+def get_feedback_matrix(guess_codes, answer_codes):
+    '''
+    Calculate the feedback patterns for every pair of encoded guess and answer words.
+
+    The result has one row per guess and one column per answer. Each pattern is encoded as a base-3 number
+    with one digit per position in the word (0 for no match, 1 for yellow and 2 for green, with the first
+    position as the least significant digit). The same rules as get_specific_guess_score are used:
+    greens are matched first, then yellows are assigned from left to right while unmatched answer letters remain.
+    '''
+    count_work('pairs_scored', len(guess_codes) * len(answer_codes))
+    word_length = guess_codes.shape[1]
+    guess_columns = [guess_codes[:, i, None] for i in range(word_length)]
+    answer_columns = [answer_codes[None, :, i] for i in range(word_length)]
+    not_greens = [guess_columns[i] != answer_columns[i] for i in range(word_length)]
+    shape = (len(guess_codes), len(answer_codes))
+    patterns = np.zeros(shape, dtype=get_feedback_dtype(word_length))
+    for i in range(word_length):
+        # answer letters not matched by a green that could match this guess letter
+        available = np.zeros(shape, dtype=np.uint8)
+        for k in range(word_length):
+            available += (answer_columns[k] == guess_columns[i]) & not_greens[k]
+        # earlier guess letters (not matched by a green) that have already claimed one of those answer letters
+        claimed = np.zeros(shape, dtype=np.uint8)
+        for j in range(i):
+            claimed += (guess_columns[j] == guess_columns[i]) & not_greens[j]
+        yellows = not_greens[i] & (available > claimed)
+        digits = np.where(not_greens[i], yellows, np.uint8(2)).astype(patterns.dtype)
+        patterns += digits * patterns.dtype.type(3 ** i)
+    return patterns
+
+
+def get_memory_budget(fraction):
+    '''
+    Calculate the number of bytes in a fraction of the memory limit (or None if there is no memory limit).
+    '''
+    if MEMORY_LIMIT is None:
         return None
-    return [r.word for r in result]
+    return max(1, int(MEMORY_LIMIT * 2 ** 20 * fraction))
 
 
-def print_letters_by_frequency(answer_letter_freqs):
+def get_feedback_tile_shape(num_answers, word_length, bytes_per_guess=0):
     '''
-    Display the letters of the alphabet, sorted by frequency of occurrence.
-    
-    Letter frequencies are displayed for their overall occurrence anywhere in the word,
-    and for their occurrence in each specific position in the word.
+    Choose how many guesses and answers to calculate the feedback matrix for at once.
+
+    Without a memory limit, blocks of guesses are scored against every answer. Otherwise, tiles are chosen so that
+    the memory used while calculating and reducing them (estimated per pair of words, plus bytes_per_guess for
+    anything the caller keeps for each guess in a tile) fits in half of the memory limit, preferring tiles that
+    cover every answer, so that the answers only have to be split up when there are too many of them.
     '''
-    def format_letters_by_frequency(log_freqs, colour, highlight_letters=set(), join_on=" ", block_separator="     "):
-        '''
-        Format letters into sorted blocks (for display) ordered by frequency, with some letters highlighted.
-    
-        Highlighted letters are printed in upper case, while non-highlighted letters are printed in lowercase.
-        '''
-        def get_sorted_letters():
-            sorted_letters = [letter for letter, _ in sorted(log_freqs.items(), key=itemgetter(1), reverse=True)]
-            return [
-                coloured(letter.upper(), colour, attrs=['bold']) if letter in highlight_letters
-                        else coloured(letter.lower(), colour)
-                for letter in sorted_letters]
-        def format_letter_blocks(letters):
-            if len(letters) < len(alphabet):
-                letters += [' '] * (len(alphabet) - len(letters))
-            out = []
-            for i in range(0, len(letters), PRINTING_BLOCK_SIZE):
-                out.append(join_on.join(letters[slice(i, i + PRINTING_BLOCK_SIZE, 1)]))
-            if len(out) == PRINTING_BLOCK_SIZE + 1:
-                out[PRINTING_BLOCK_SIZE - 1] += join_on + out[PRINTING_BLOCK_SIZE]
-                del(out[PRINTING_BLOCK_SIZE])
-            return block_separator.join(out)
-        alphabet = set(ALPHABET)
-        sorted_letters = format_letter_blocks(get_sorted_letters())
-        missing_letters = " ".join(alphabet - set(log_freqs.keys()))
-        missing_letters = coloured(f"[ {missing_letters} ]" if len(missing_letters) > 0 else '', 'red')
-        return f"{sorted_letters}     {missing_letters}"
+    budget = get_memory_budget(0.5)
+    if budget is None:
+        return FEEDBACK_BLOCK_SIZE, num_answers
+    # the comparisons and counts for each position, the patterns and their digits, and their greens and yellows
+    pair_bytes = word_length + 6 + 3 * np.dtype(get_feedback_dtype(word_length)).itemsize
+    num_guesses = min(FEEDBACK_BLOCK_SIZE, budget // (num_answers * pair_bytes + bytes_per_guess))
+    if num_guesses >= FEEDBACK_MIN_TILE_GUESSES:
+        return num_guesses, num_answers
+    num_guesses = max(1, min(FEEDBACK_MIN_TILE_GUESSES, budget // (2 * (pair_bytes + bytes_per_guess))))
+    return num_guesses, max(1, min(num_answers, (budget // num_guesses - bytes_per_guess) // pair_bytes))
 
-    planned_guess_letters = set()
-    if PLANNED_GUESSES:
-        for guess in PLANNED_GUESSES:
-            for letter in guess:
-                planned_guess_letters.add(letter)
-    print(coloured("\nLetters in answer words, sorted by frequency from most to least " +
-            "(letters in planned guesses are capitalized)", attrs=['bold']))
-    formatted_letters = format_letters_by_frequency(
-            answer_letter_freqs[0], colour='magenta', highlight_letters=planned_guess_letters)
-    print(coloured(f"In any position:     {formatted_letters}", 'magenta'))
-    for pos in range(1, 6):
-        formatted_letters = format_letters_by_frequency(
-                answer_letter_freqs[pos], colour='cyan', highlight_letters=planned_guess_letters)
-        print(coloured(f"In position {pos}:       {formatted_letters}", 'cyan'))
 
+def iter_feedback_tiles(guess_codes, answer_codes, bytes_per_guess=0):
+    '''
+    Calculate the feedback matrix in tiles of guesses and answers, to limit the amount of memory used at once
+    (see get_feedback_tile_shape).
 
-def print_guesses_with_best_expected_scores(expected_guess_scores, answers, limit_guesses_to=None):
+    Yields the index of the first guess and the first answer in each tile together with the feedback patterns
+    for that tile. The tiles for each block of guesses are yielded together, in order of their answers.
     '''
-    Display possible guess words with the best expected scores.
-    
-    The best guesses are displayed based on words that will produce the most total greens only,
-    the most total yellows only, and the most total hits (either yellow or green).
-    As well, the best guesses are displayed based on a weighted score
-    where each green is counted as more than one yellow.
+    num_tile_guesses, num_tile_answers = get_feedback_tile_shape(len(answer_codes), guess_codes.shape[1],
+            bytes_per_guess)
+    for start in range(0, len(guess_codes), num_tile_guesses):
+        for answer_start in range(0, max(1, len(answer_codes)), num_tile_answers):
+            yield start, answer_start, get_feedback_matrix(guess_codes[start:start + num_tile_guesses],
+                    answer_codes[answer_start:answer_start + num_tile_answers])
+
+
+def get_feedback_patterns(guess_codes, answer_codes):
     '''
-    def format_score_summary(*guesses, ideal_weighted_score=None):
-        w = sum(get_weighted_score(guess) for guess in guesses)
-        g = sum(guess.greens for guess in guesses)
-        y = sum(guess.yellows for guess in guesses)
-        t = sum(guess.total for guess in guesses)
-        weighted_score_diff = f" {w - ideal_weighted_score:0.2f}" if ideal_weighted_score else ''
-        return coloured(f"{w:0.2f}{weighted_score_diff}", 'blue', attrs=['bold']) + " | " + \
-                coloured(f"{g:0.2f}", 'green') + " + " + \
-                coloured(f"{y:0.2f}", 'yellow') + " = " + \
-                coloured(f"{t:0.2f}", 'cyan')
-    
-    # def format_planned_guesses(planned_guesses, count):
-    #     formatted_planned_guesses = "' and '".join(PLANNED_GUESSES[0:count+1])
-    
-    print("")
-    # only consider guesses that do not include too many duplicated letters
-    possible_guesses = [guess for guess in expected_guess_scores
-            if len(set(guess.word)) >= WORD_LENGTH - MAX_DUPLICATE_GUESS_LETTERS]
-    # only consider guesses that are within the limited set, if specified
-    if limit_guesses_to:
-        limit_guesses_to = set(limit_guesses_to)
-        possible_guesses = [guess for guess in possible_guesses if guess.word in limit_guesses_to]
-    legal_guess_set = set(guess.word for guess in expected_guess_scores)
-    print(f"Considering {len(possible_guesses)} possible guesses out of {len(legal_guess_set)} legal guesses")
-    
-    ideal_guesses = get_ideal_weighted_guess_scores(expected_guess_scores)
-    print("Statistically ideal guesses are: '" + "' and '".join(g.word for g in ideal_guesses) + "'")
-    
-    print(coloured("\nTop scoring initial guesses:", attrs=['bold']))
-    most_greens = [guess for guess in sorted(possible_guesses, key=attrgetter('greens'), reverse=True)]
-    most_yellows = [guess for guess in sorted(possible_guesses, key=attrgetter('yellows'), reverse=True)]
-    most_total = [guess for guess in sorted(possible_guesses, key=attrgetter('total'), reverse=True)]
-    top_weighted = [guess for guess in sorted(possible_guesses, key=get_weighted_score, reverse=True)]
-    print(f"Most Greens:             ({format_score_summary(most_greens[0])}) " + \
-            f"{', '.join(g.word for g in most_greens[0:PRINTING_NUM_WORDS])}")
-    print(f"Most Yellows:            ({format_score_summary(most_yellows[0])}) " + \
-            f"{', '.join(g.word for g in most_yellows[0:PRINTING_NUM_WORDS])}")
-    print(f"Most Total Hits:         ({format_score_summary(most_total[0])}) " + \
-            f"{', '.join(g.word for g in most_total[0:PRINTING_NUM_WORDS])}")
-    print(coloured(f"Best Weighted Score:", attrs=['underline']) + \
-            f"     ({format_score_summary(top_weighted[0])}) " + \
-            f"{', '.join(coloured(g.word, attrs=['underline']) for g in top_weighted[0:PRINTING_NUM_WORDS])}")
-    
-    if PLANNED_GUESSES:
-        planned_guess_scores = [get_expected_guess_score(guess, answers) for guess in PLANNED_GUESSES]
-        previous_guess_letters = set()
-        for i in range(0, len(PLANNED_GUESSES)):
-            ideal_weighted_score = sum(get_weighted_score(guess) for guess in ideal_guesses[0:i+1])
-            print(ideal_weighted_score)
-            next_guess = PLANNED_GUESSES[i]
-            previous_guess_letters = previous_guess_letters.union(set(PLANNED_GUESSES[i]))
-            most_greens_2 = [guess for guess in most_greens
-                    if len(previous_guess_letters.intersection(set(guess.word))) == 0]
-            most_yellows_2 = [guess for guess in most_yellows
-                    if len(previous_guess_letters.intersection(set(guess.word))) == 0]
-            most_total_2 = [guess for guess in most_total
-                    if len(previous_guess_letters.intersection(set(guess.word))) == 0]
-            top_weighted_2 = [guess for guess in top_weighted
-                    if len(previous_guess_letters.intersection(set(guess.word))) == 0]
-            formatted_planned_guesses = "' and '".join(PLANNED_GUESSES[0:i+1])
-            print(coloured(f"\nTop scoring guesses after '{formatted_planned_guesses}'     ", attrs=['bold']) + \
-                    format_score_summary(*planned_guess_scores[0:i+1], ideal_weighted_score=ideal_weighted_score) + ":")
-            if len(top_weighted_2) == 0:
-                print(coloured("No legal guesses remain that meet the chosen criteria", 'red'))
-                break
-            if not next_guess in legal_guess_set:
-                print(coloured(
-                        f"WARNING: planned guess '{next_guess}' is not in the set of legal guesses",
-                        'red', attrs=['bold']))
-            print(f"Most Greens:             ({format_score_summary(most_greens_2[0])}) " + \
-                    f"{', '.join(g.word for g in most_greens_2[0:PRINTING_NUM_WORDS])}")
-            print(f"Most Yellows:            ({format_score_summary(most_yellows_2[0])}) " + \
-                    f"{', '.join(g.word for g in most_yellows_2[0:PRINTING_NUM_WORDS])}")
-            print(f"Most Total Hits:         ({format_score_summary(most_total_2[0])}) " + \
-                    f"{', '.join(g.word for g in most_total_2[0:PRINTING_NUM_WORDS])}")
-            print(coloured(f"Best Weighted Score:", attrs=['underline']) + \
-                    f"     ({format_score_summary(top_weighted_2[0])}) " + \
-                    f"{', '.join(coloured(g.word, attrs=['underline']) for g in top_weighted_2[0:PRINTING_NUM_WORDS])}")
+    Calculate the feedback matrix for encoded guesses, as a scoring function for score_guesses_in_chunks.
+    '''
+    patterns = np.zeros((len(guess_codes), len(answer_codes)), dtype=get_feedback_dtype(guess_codes.shape[1]))
+    for start, answer_start, tile in iter_feedback_tiles(guess_codes, answer_codes):
+        patterns[start:start + tile.shape[0], answer_start:answer_start + tile.shape[1]] = tile
+    return (patterns,)
 
 
-def main():
-    global PLANNED_GUESSES
-    args = parse_args(sys.argv[1:])
-    print(coloured(f"Wordle Statistics.", 'green', attrs=['bold']))
-    if PLANNED_GUESSES and not args.seek_optimal_guesses:
-        print(f"Planned guesses: {' '.join(PLANNED_GUESSES)}")
-    
-    # load word data
-    print(coloured("\nLoading data", attrs=['bold']))
+def decode_feedback(pattern, word_length=None):
+    '''
+    Convert an encoded feedback pattern into the string format returned by get_specific_guess_score.
+    '''
+    word_length = word_length or WORD_LENGTH
+    pattern = int(pattern)
+    result = []
+    for _ in range(word_length):
+        result.append('.yG'[pattern % 3])
+        pattern //= 3
+    return ''.join(result)
+
+
+@lru_cache(maxsize=None)
+def get_pattern_hit_counts(word_length):
+    '''
+    Count the number of greens and yellows in every possible encoded feedback pattern.
+    '''
+    digits = (np.arange(3 ** word_length)[:, None] // 3 ** np.arange(word_length)[None, :]) % 3
+    return (digits == 2).sum(axis=1), (digits == 1).sum(axis=1)
+
+
+def get_hit_counts(guess_codes, answer_codes, progress=None, jobs=1):
+    '''
+    Calculate the total number of greens and yellows each encoded guess would receive over all the answers.
+
+    With more than one job, the guesses are split into chunks that are scored in a pool of worker processes.
+    The results are identical either way. If given, progress is called with the number of guesses completed
+    so far and the total number of guesses each time a block or chunk is finished.
+    '''
+    if jobs > 1 and len(guess_codes) > BUILD_CHUNK_SIZE:
+        return score_guesses_in_chunks(get_hit_counts, guess_codes, answer_codes, progress=progress, jobs=jobs)
+    green_counts, yellow_counts = (counts.astype(np.uint8) for counts in get_pattern_hit_counts(guess_codes.shape[1]))
+    greens = np.zeros(len(guess_codes), dtype=np.int64)
+    yellows = np.zeros(len(guess_codes), dtype=np.int64)
+    for start, answer_start, patterns in iter_feedback_tiles(guess_codes, answer_codes):
+        greens[start:start + len(patterns)] += green_counts[patterns].sum(axis=1, dtype=np.int64)
+        yellows[start:start + len(patterns)] += yellow_counts[patterns].sum(axis=1, dtype=np.int64)
+        if progress and answer_start + patterns.shape[1] >= len(answer_codes):
+            progress(start + len(patterns), len(guess_codes))
+    return greens, yellows
+
+
+def get_partition_scores(guess_codes, answer_codes, progress=None, jobs=1):
+    '''
+    Calculate how well each encoded guess would split the answers into groups that share the same feedback.
+
+    Returns the entropy of the feedback (in bits), the expected number of answers remaining after the guess,
+    and the size of the largest group of answers remaining, for each guess. Arguments are as for get_hit_counts.
+    '''
+    if jobs > 1 and len(guess_codes) > BUILD_CHUNK_SIZE:
+        return score_guesses_in_chunks(get_partition_scores, guess_codes, answer_codes, progress=progress, jobs=jobs)
+    word_length = guess_codes.shape[1]
+    entropy = np.zeros(len(guess_codes))
+    expected_remaining = np.zeros(len(guess_codes))
+    max_bucket = np.zeros(len(guess_codes), dtype=np.int64)
+    # the group counts of a block of guesses are added up over the tiles of answers
+    for start, answer_start, patterns in iter_feedback_tiles(guess_codes, answer_codes,
+            bytes_per_guess=8 * 3 ** word_length):
+        end = start + len(patterns)
+        tile_counts = count_feedback_groups(patterns, word_length)
+        counts = tile_counts if answer_start == 0 else counts + tile_counts
+        if answer_start + patterns.shape[1] >= len(answer_codes):
+            entropy[start:end], expected_remaining[start:end], max_bucket[start:end] = \
+                    get_group_partition_scores(counts, len(patterns), len(answer_codes))
+            if progress:
+                progress(end, len(guess_codes))
+    return entropy, expected_remaining, max_bucket
+
+
+def count_feedback_groups(patterns, word_length, rows=None):
+    '''
+    Count the answers sharing each feedback pattern, for each guess in a matrix of feedback patterns
+    (with one row per guess and one column per answer), as a flat array with 3 ** word_length counts per guess.
+    If rows are given (an array of indices), only the guesses in those rows are counted, in that order.
+
+    The guesses are counted in blocks, so that the counts being added to stay in the CPU cache, and the patterns
+    offset by their guess are never all held at once.
+    '''
+    num_guesses = patterns.shape[0] if rows is None else len(rows)
+    num_patterns = 3 ** word_length
+    counts = np.empty(num_guesses * num_patterns, dtype=np.int64)
+    offsets = np.arange(min(COUNT_BLOCK_SIZE, num_guesses), dtype=np.int64)[:, None] * num_patterns
+    for start in range(0, num_guesses, COUNT_BLOCK_SIZE):
+        block = patterns[start:start + COUNT_BLOCK_SIZE] if rows is None else \
+                patterns[rows[start:start + COUNT_BLOCK_SIZE]]
+        # the order of the groups does not matter here, so the patterns are read in whatever order they are stored
+        counts[start * num_patterns:(start + len(block)) * num_patterns] = np.bincount(
+                (block + offsets[:len(block)]).ravel(order='K'), minlength=len(block) * num_patterns)
+    return counts
+
+
+def get_pattern_partition_scores(patterns, word_length, rows=None):
+    '''
+    Calculate the partition scores (see get_partition_scores) from a matrix of feedback patterns,
+    with one row per guess and one column per answer (or from only the given rows, as in count_feedback_groups).
+
+    The answers sharing each feedback pattern are counted together, and the scores are then calculated from
+    the groups that are not empty, so that few answers can be scored quickly against many guesses.
+    '''
+    num_guesses, num_answers = patterns.shape
+    num_guesses = num_guesses if rows is None else len(rows)
+    return get_group_partition_scores(count_feedback_groups(patterns, word_length, rows), num_guesses, num_answers)
+
+
+def get_group_partition_scores(counts, num_guesses, num_answers):
+    '''
+    Calculate the partition scores (see get_partition_scores) from the counts of the answers sharing each feedback
+    pattern (as returned by count_feedback_groups).
+    '''
+    num_patterns = len(counts) // num_guesses
+    groups = np.flatnonzero(counts)
+    sizes = counts[groups]
+    group_guesses = groups // num_patterns
+    entropy = math.log2(num_answers) - \
+            np.bincount(group_guesses, weights=sizes * np.log2(sizes), minlength=num_guesses) / num_answers
+    expected_remaining = np.bincount(group_guesses, weights=sizes * sizes, minlength=num_guesses) / num_answers
+    max_bucket = np.maximum.reduceat(sizes, np.searchsorted(group_guesses, np.arange(num_guesses)))
+    return entropy, expected_remaining, max_bucket
+
+
+# encoded answers shared by every chunk scored in a worker process (set once, when the worker starts)
+WORKER_ANSWER_CODES = None
+
+
+def init_scoring_worker(answer_codes, memory_limit):
+    '''
+    Prepare a worker process to score chunks of guesses against the given encoded answers,
+    within its share of the memory limit.
+    '''
+    global MEMORY_LIMIT, WORKER_ANSWER_CODES
+    MEMORY_LIMIT = memory_limit
+    WORKER_ANSWER_CODES = answer_codes
+
+
+def score_guess_chunk(scorer, start, guess_codes):
+    '''
+    Score one chunk of encoded guesses with the given scoring function, in a worker process.
+    '''
+    return start, scorer(guess_codes, WORKER_ANSWER_CODES)
+
+
+def iter_scored_chunks(scorer, guess_codes, answer_codes, starts, jobs=1):
+    '''
+    Score the chunks of encoded guesses beginning at each of the given starting indices.
+
+    The scoring function (such as get_hit_counts) is called with a chunk of encoded guesses and the encoded answers,
+    and returns a tuple of arrays with one score (or row of scores) per guess. With more than one job, the chunks
+    are scored in a pool of worker processes. The encoded answers are sent to each worker once, when it starts,
+    rather than with every chunk, and the memory limit is shared between them. Chunks may then finish in any order,
+    so the starting index of each chunk is yielded together with its scores.
+    '''
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    if jobs > 1 and len(starts) > 1:
+        memory_limit = MEMORY_LIMIT / jobs if MEMORY_LIMIT is not None else None
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_scoring_worker,
+                initargs=(answer_codes, memory_limit)) as pool:
+            futures = [pool.submit(score_guess_chunk, scorer, start, guess_codes[start:start + BUILD_CHUNK_SIZE])
+                    for start in starts]
+            for future in as_completed(futures):
+                start, scores = future.result()
+                # pairs scored in the worker processes are not counted there
+                count_work('pairs_scored', len(scores[0]) * len(answer_codes))
+                yield start, scores
+    else:
+        for start in starts:
+            yield start, scorer(guess_codes[start:start + BUILD_CHUNK_SIZE], answer_codes)
+
+
+def save_checkpoint(directory, start, guess_codes, scores):
+    '''
+    Durably save the scores for a completed chunk of encoded guesses.
+    '''
+    filename = os.path.join(directory, f"chunk_{start:09d}.npz")
+    with open(filename + '~', 'wb') as out:
+        np.savez(out, words=guess_codes, **{f"scores_{i}": column for i, column in enumerate(scores)})
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(filename + '~', filename)
+
+
+def load_checkpoints(directory, guess_codes):
+    '''
+    Load the scores for the chunks of encoded guesses that were completed by an earlier, interrupted calculation.
+
+    Checkpoints are only used if they cover exactly the same guesses as the corresponding chunk does now.
+    Returns a dictionary from the starting index of each completed chunk to its scores.
+    '''
+    completed = {}
+    if not os.path.isdir(directory):
+        return completed
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith('chunk_') and name.endswith('.npz')):
+            continue
+        start = int(name[len('chunk_'):-len('.npz')])
+        try:
+            with np.load(os.path.join(directory, name)) as checkpoint:
+                words = checkpoint['words']
+                scores = [checkpoint[f"scores_{i}"] for i in range(len(checkpoint.files) - 1)]
+        except (OSError, ValueError, KeyError):
+            continue
+        if start % BUILD_CHUNK_SIZE == 0 and np.array_equal(words, guess_codes[start:start + BUILD_CHUNK_SIZE]):
+            completed[start] = scores
+    return completed
+
+
+def allocate_scores(shape, dtype, spill_filename=None):
+    '''
+    Allocate a zeroed array for scores. If a spill file is given and the array would take more than a quarter of
+    the memory limit, the array is kept in that file (memory-mapped) instead of in memory.
+
+    Spilled scores with more than one column per guess are stored with one row per column (as the transpose of the
+    array returned), the way feedback patterns are cached, so that they can be saved by reading the file in order.
+    '''
+    budget = get_memory_budget(0.25)
+    num_bytes = math.prod(shape) * np.dtype(dtype).itemsize
+    if spill_filename is None or budget is None or num_bytes <= budget:
+        return np.zeros(shape, dtype=dtype)
+    with open(spill_filename, 'w+b') as f:
+        f.truncate(num_bytes)
+        data = mmap.mmap(f.fileno(), 0)
+    return np.frombuffer(data, dtype=dtype).reshape(shape[::-1]).T
+
+
+def release_mapped_pages(array):
+    '''
+    Let go of the pages of a memory-mapped array (or of a view of one) that have been read or written so far,
+    so that they no longer count towards the memory used by this process (their contents stay in the file).
+    Does nothing for arrays that are not memory-mapped.
+    '''
+    base = array
+    while base is not None and not isinstance(base, mmap.mmap):
+        base = base.obj if isinstance(base, memoryview) else getattr(base, 'base', None)
+    if base is not None and hasattr(mmap, 'MADV_DONTNEED'):
+        base.madvise(mmap.MADV_DONTNEED)
+
+
+def score_guesses_in_chunks(scorer, guess_codes, answer_codes, checkpoint_directory=None, progress=None, jobs=1):
+    '''
+    Score encoded guesses with the given scoring function (as iter_scored_chunks does), one chunk at a time.
+
+    If a checkpoint directory is given, each completed chunk is saved in it as a checkpoint, and chunks already
+    saved there by an earlier, interrupted calculation are not recalculated. Scores too large for the memory limit
+    are kept in memory-mapped files in the checkpoint directory too (see allocate_scores). The checkpoint directory
+    should be removed by the caller once the results have been saved.
+    '''
+    scores = None
+    num_done = 0
+    def store(start, chunk_scores):
+        nonlocal scores, num_done
+        if scores is None:
+            scores = tuple(allocate_scores((len(guess_codes),) + column.shape[1:], column.dtype,
+                    os.path.join(checkpoint_directory, f"scores_{i}.npy") if checkpoint_directory else None)
+                    for i, column in enumerate(chunk_scores))
+        for column, chunk_column in zip(scores, chunk_scores):
+            column[start:start + len(chunk_column)] = chunk_column
+            release_mapped_pages(column)
+        num_done += len(chunk_scores[0])
+    completed = load_checkpoints(checkpoint_directory, guess_codes) if checkpoint_directory else {}
+    if len(completed) > 0:
+        print(f"Resuming from {len(completed)} checkpoints saved in '{checkpoint_directory}'")
+    if checkpoint_directory:
+        os.makedirs(checkpoint_directory, exist_ok=True)
+    for start, chunk_scores in completed.items():
+        store(start, chunk_scores)
+    starts = [start for start in range(0, len(guess_codes), BUILD_CHUNK_SIZE) if start not in completed]
+    for start, chunk_scores in iter_scored_chunks(scorer, guess_codes, answer_codes, starts, jobs):
+        if checkpoint_directory:
+            save_checkpoint(checkpoint_directory, start, guess_codes[start:start + BUILD_CHUNK_SIZE], chunk_scores)
+        store(start, chunk_scores)
+        if progress:
+            progress(num_done, len(guess_codes))
+    return scores if scores is not None else scorer(guess_codes, answer_codes)
+
+
+def make_expected_score(guess_word, greens, yellows, num_answers):
+    '''
+    Build the expected score of a guess word from its total numbers of greens and yellows over all the answers.
+    '''
+    greens, yellows = int(greens), int(yellows)
+    return ExpectedScore(guess_word, greens / num_answers, yellows / num_answers, (greens + yellows) / num_answers)
+
+
+def get_expected_guess_score(guess_word, answers):
+    '''
+    Calculate the expected score of a guess word relative to all the possible answer words.
+    '''
+    answer_codes = answers if isinstance(answers, np.ndarray) else encode_words(answers)
+    greens, yellows = get_hit_counts(encode_words([guess_word]), answer_codes)
+    return make_expected_score(guess_word, greens[0], yellows[0], len(answer_codes))
+
+
+def get_cache_key(table, guesses, answers):
+    '''
+    Calculate the key identifying a cached table of scores.
+
+    The key depends on the contents of both wordlists, the word length and the scoring version,
+    so that a cache is never reused after any of them change.
+    '''
+    digest = hashlib.sha256(f"{table}\n{SCORING_VERSION}\n{WORD_LENGTH}\n".encode('utf-8'))
+    digest.update('\n'.join(guesses).encode('utf-8'))
+    digest.update(b'\0')
+    digest.update('\n'.join(answers).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def get_cache_filename(table, key):
+    '''
+    Determine the name of the file in which a cached table of scores is stored.
+
+    Caches for different word lengths and wordlists are stored side by side in the cache directory.
+    '''
+    return os.path.join(CACHE_DIRECTORY, f"{table}_{WORD_LENGTH}_{key[:16]}.bin")
+
+
+def write_score_cache(filename, metadata, arrays):
+    '''
+    Save a table of scores to a binary cache file.
+
+    The file starts with a magic string and a JSON header (holding the metadata and the name, type, shape
+    and location of each array), followed by the raw contents of each array, aligned to 8 bytes.
+    The file is written under a temporary name and then renamed, so that it is never seen half-written.
+    Arrays are written a block of rows at a time, so that large (or memory-mapped, or transposed) arrays
+    are never copied into memory all at once.
+    '''
+    def align(offset):
+        return (offset + 7) // 8 * 8
+    layout = []
+    offset = 0
+    for name, array in arrays.items():
+        layout.append({'name': name, 'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset})
+        offset = align(offset + array.nbytes)
+    header = json.dumps({'format_version': CACHE_FORMAT_VERSION, 'metadata': metadata, 'arrays': layout})
+    header = header.encode('utf-8')
+    header += b' ' * (align(len(CACHE_MAGIC) + 4 + len(header)) - len(CACHE_MAGIC) - 4 - len(header))
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    with open(filename + '~', 'wb') as out:
+        out.write(CACHE_MAGIC)
+        out.write(len(header).to_bytes(4, 'little'))
+        out.write(header)
+        block_size = min(CACHE_WRITE_BLOCK_SIZE, get_memory_budget(0.125) or CACHE_WRITE_BLOCK_SIZE)
+        for array in arrays.values():
+            rows_per_block = max(1, block_size // max(1, array[0:1].nbytes))
+            for start in range(0, len(array), rows_per_block):
+                out.write(np.ascontiguousarray(array[start:start + rows_per_block]).tobytes())
+                release_mapped_pages(array)
+            out.write(b'\0' * (align(array.nbytes) - array.nbytes))
+    os.replace(filename + '~', filename)
+
+
+def get_memoryview_format(dtype):
+    '''
+    Find the memoryview (struct) format of a numpy type string (such as '<f8'), or None if it has none, as it
+    is not in this machine's byte order, or is not a number.
+    '''
+    byte_order, kind, size = dtype[0], dtype[1], dtype[2:]
+    if byte_order not in ('|', '<' if sys.byteorder == 'little' else '>'):
+        return None
+    return {('f', '4'): 'f', ('f', '8'): 'd', ('i', '1'): 'b', ('i', '2'): 'h', ('i', '4'): 'i', ('i', '8'): 'q',
+            ('u', '1'): 'B', ('u', '2'): 'H', ('u', '4'): 'I', ('u', '8'): 'Q'}.get((kind, size))
+
+
+def read_score_cache(filename, as_memoryviews=False):
+    '''
+    Load a table of scores from a binary cache file.
+
+    The file is memory-mapped, so the arrays are only read from disk as they are used. As memoryviews, the arrays
+    are read as memoryviews of the file (cast to their type and shape) rather than as numpy arrays, so that
+    numpy need not be loaded to read them, where the type has a memoryview format on this machine.
+    Returns the metadata and a dictionary of arrays, or None if the file is missing or not a valid cache.
+    '''
+    if not os.path.exists(filename):
+        return None
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < len(CACHE_MAGIC) + 4:
+            return None
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if data[:len(CACHE_MAGIC)] != CACHE_MAGIC:
+        return None
+    header_length = int.from_bytes(data[len(CACHE_MAGIC):len(CACHE_MAGIC) + 4], 'little')
+    data_start = len(CACHE_MAGIC) + 4 + header_length
+    try:
+        header = json.loads(data[len(CACHE_MAGIC) + 4:data_start].decode('utf-8'))
+        if header['format_version'] != CACHE_FORMAT_VERSION:
+            return None
+        arrays = {}
+        for entry in header['arrays']:
+            view_format = get_memoryview_format(entry['dtype']) if as_memoryviews else None
+            if view_format is not None:
+                count = math.prod(entry['shape'])
+                start = data_start + entry['offset']
+                view = memoryview(data)[start:start + count * struct.calcsize(view_format)]
+                arrays[entry['name']] = view.cast(view_format, entry['shape']) if count > 0 else view
+                continue
+            dtype = np.dtype(entry['dtype'])
+            count = int(np.prod(entry['shape']))
+            arrays[entry['name']] = np.frombuffer(
+                    data, dtype=dtype, count=count, offset=data_start + entry['offset']).reshape(entry['shape'])
+    except (ValueError, KeyError):
+        return None
+    return header['metadata'], arrays
+
+
+def read_legacy_expected_guess_scores(filename, guesses, answers):
+    '''
+    Read expected guess scores from a cache file in the legacy text format, and recover the hit counts from them.
+
+    Legacy cache files do not record which wordlists they were calculated from, so they are only used
+    if they contain exactly the current legal guesses. Returns None otherwise.
+    '''
+    if not os.path.exists(filename):
+        return None
+    with open(filename, 'r') as f:
+        rows = [[field.strip() for field in line.split(',')] for line in f if line.strip()]
+    if [row[0] for row in rows] != list(guesses):
+        print(coloured(f"WARNING: ignoring '{filename}', which does not match the current wordlists", 'red'))
+        return None
+    greens = np.rint(np.array([float(row[1]) for row in rows]) * len(answers)).astype(np.int64)
+    yellows = np.rint(np.array([float(row[2]) for row in rows]) * len(answers)).astype(np.int64)
+    return greens, yellows
+
+
+def find_incremental_base(table, guesses, answers):
+    '''
+    Find the cached table of hit counts (for other wordlists) that can be updated to the current wordlists
+    with the least amount of work.
+
+    Rows for guesses in the cached table only need to be updated for the answers that have been added or removed,
+    while new guesses must be scored against every answer. Returns None if no cached table would be cheaper
+    to update than calculating every score from scratch.
+    '''
+    if not os.path.isdir(CACHE_DIRECTORY):
+        return None
+    best_base = None
+    best_cost = len(guesses) * len(answers)
+    for name in sorted(os.listdir(CACHE_DIRECTORY)):
+        if not (name.startswith(f"{table}_{WORD_LENGTH}_") and name.endswith('.bin')):
+            continue
+        cache = read_score_cache(os.path.join(CACHE_DIRECTORY, name))
+        if cache is None:
+            continue
+        metadata, arrays = cache
+        if metadata.get('scoring_version') != SCORING_VERSION or metadata.get('word_length') != WORD_LENGTH or \
+                not all(array_name in arrays for array_name in ('answers', 'green_hits', 'yellow_hits')):
+            continue
+        # the words are decoded with the alphabet they were encoded with (older cache files only used a to z)
+        alphabet = metadata.get('alphabet', 'abcdefghijklmnopqrstuvwxyz')
+        if max(arrays['answers'].max(initial=0), arrays['words'].max(initial=0)) >= len(alphabet):
+            continue
+        base_answers = Counter(decode_words(arrays['answers'], alphabet))
+        added_answers = Counter(answers) - base_answers
+        removed_answers = base_answers - Counter(answers)
+        rows = {word: row for row, word in enumerate(decode_words(arrays['words'], alphabet))}
+        num_new_guesses = sum(1 for guess_word in guesses if guess_word not in rows)
+        num_changed_answers = sum(added_answers.values()) + sum(removed_answers.values())
+        cost = num_new_guesses * len(answers) + (len(guesses) - num_new_guesses) * num_changed_answers
+        if cost < best_cost:
+            best_base = (os.path.join(CACHE_DIRECTORY, name), arrays, rows, added_answers, removed_answers)
+            best_cost = cost
+    return best_base
+
+
+def update_hit_counts(base, guesses, answers, checkpoint_directory, progress=None, jobs=1):
+    '''
+    Calculate hit counts for the current wordlists by updating a cached table found by find_incremental_base.
+
+    Guesses in the cached table are only scored against the answers that have been added or removed,
+    and new guesses are scored (with checkpoints) against every answer.
+    '''
+    _, arrays, rows, added_answers, removed_answers = base
+    guess_codes = encode_words(guesses)
+    rows = np.array([rows.get(guess_word, -1) for guess_word in guesses], dtype=np.int64)
+    known = rows >= 0
+    greens = np.zeros(len(guesses), dtype=np.int64)
+    yellows = np.zeros(len(guesses), dtype=np.int64)
+    greens[known] = arrays['green_hits'][rows[known]]
+    yellows[known] = arrays['yellow_hits'][rows[known]]
+    for changed_answers, sign in ((added_answers, 1), (removed_answers, -1)):
+        if len(changed_answers) > 0:
+            changed_greens, changed_yellows = get_hit_counts(
+                    guess_codes[known], encode_words(changed_answers.elements()), jobs=jobs)
+            greens[known] += sign * changed_greens
+            yellows[known] += sign * changed_yellows
+    if not known.all():
+        new_greens, new_yellows = score_guesses_in_chunks(get_hit_counts, guess_codes[~known], encode_words(answers),
+                checkpoint_directory=checkpoint_directory, progress=progress, jobs=jobs)
+        greens[~known] = new_greens
+        yellows[~known] = new_yellows
+    return greens, yellows
+
+
+def get_all_expected_guess_scores(guesses, answers):
+    '''
+    Calculate the expected scores of every legal guess (see load_score_table).
+    '''
+    return get_expected_scores(load_score_table(guesses, answers))
+
+
+def load_score_table(guesses, answers, as_memoryviews=False):
+    '''
+    Calculate the expected scores of every legal guess, as a table with one array per score (and the guess words).
+    As memoryviews, scores loaded from the cache are memoryviews rather than numpy arrays (see read_score_cache).
+    
+    Once calculated, the scores are saved in a binary cache file for future use, and loaded from it
+    instead of recalculated on subsequent runs. The cache file is specific to the current wordlists
+    and word length, so the scores are recalculated automatically whenever either of them changes.
+    When words are added to (or removed from) the wordlists, the cache file for the previous wordlists is
+    updated incrementally, rather than recalculating every score. A cache file in the legacy text format
+    is converted on first use. Long calculations save checkpoints as they go, and resume from them
+    if they are interrupted.
+    '''
+    import shutil
+    table = 'expected_guess_scores'
+    key = get_cache_key(table, guesses, answers)
+    filename = get_cache_filename(table, key)
+    checkpoint_directory = filename + '.partial'
+    cache = read_score_cache(filename, as_memoryviews)
+    if cache is not None and cache[0].get('key') == key:
+        print(f"Loading expected guess scores from '{filename}'")
+        count_work('cache_hits')
+        arrays = cache[1]
+    else:
+        count_work('cache_misses')
+        def progress(num_done, num_total):
+            sys.stdout.write(f"{int(100 * num_done / num_total)}% ")
+            sys.stdout.flush()
+        hit_counts = read_legacy_expected_guess_scores(EXPECTED_GUESS_SCORES_CACHE_FILE, guesses, answers)
+        base = find_incremental_base(table, guesses, answers) if hit_counts is None else None
+        if hit_counts is not None:
+            print(f"Converting expected guess scores from '{EXPECTED_GUESS_SCORES_CACHE_FILE}' " + \
+                    f"(saving to '{filename}')")
+        elif base is not None:
+            print(f"Updating expected guess scores from '{base[0]}' (saving to '{filename}')")
+            hit_counts = update_hit_counts(base, guesses, answers, checkpoint_directory, progress=progress, jobs=JOBS)
+            print('')
+        else:
+            print(f"Calculating expected guess scores (saving to '{filename}')")
+            hit_counts = score_guesses_in_chunks(get_hit_counts, encode_words(guesses), encode_words(answers),
+                    checkpoint_directory=checkpoint_directory, progress=progress, jobs=JOBS)
+            print('')
+        greens, yellows = hit_counts
+        arrays = {
+            'words': encode_words(guesses),
+            'answers': encode_words(answers),
+            'green_hits': greens,
+            'yellow_hits': yellows,
+            'greens': greens / len(answers),
+            'yellows': yellows / len(answers),
+            'total': (greens + yellows) / len(answers),
+        }
+        metadata = {'table': table, 'key': key, 'scoring_version': SCORING_VERSION,
+                'word_length': WORD_LENGTH, 'alphabet': ALPHABET, 'num_guesses': len(guesses),
+            'num_answers': len(answers)}
+        write_score_cache(filename, metadata, arrays)
+        shutil.rmtree(checkpoint_directory, ignore_errors=True)
+    # the arrays stay memory-mapped from the cache file, and the words are those already read from the wordlists
+    # (the cache key guarantees they match), so loading the table creates no objects per guess
+    return ScoreTable(list(guesses), arrays['words'], arrays['greens'], arrays['yellows'], arrays['total'])
+
+
+def get_all_partition_scores(guesses, answers):
+    '''
+    Calculate the partition scores (see get_partition_scores) of every legal guess.
+
+    The scores are cached in the same way as expected guess scores, and resume from checkpoints if interrupted.
+    '''
+    import shutil
+    table = 'partition_scores'
+    key = get_cache_key(table, guesses, answers)
+    filename = get_cache_filename(table, key)
+    checkpoint_directory = filename + '.partial'
+    cache = read_score_cache(filename)
+    if cache is not None and cache[0].get('key') == key:
+        print(f"Loading partition scores from '{filename}'")
+        count_work('cache_hits')
+        return cache[1]
+    print(f"Calculating partition scores (saving to '{filename}')")
+    count_work('cache_misses')
+    def progress(num_done, num_total):
+        sys.stdout.write(f"{int(100 * num_done / num_total)}% ")
+        sys.stdout.flush()
+    entropy, expected_remaining, max_bucket = score_guesses_in_chunks(
+            get_partition_scores, encode_words(guesses), encode_words(answers),
+            checkpoint_directory=checkpoint_directory, progress=progress, jobs=JOBS)
+    print('')
+    arrays = {
+        'words': encode_words(guesses),
+        'entropy': entropy,
+        'expected_remaining': expected_remaining,
+        'max_bucket': max_bucket,
+    }
+    metadata = {'table': table, 'key': key, 'scoring_version': SCORING_VERSION,
+            'word_length': WORD_LENGTH, 'alphabet': ALPHABET, 'num_guesses': len(guesses),
+            'num_answers': len(answers)}
+    write_score_cache(filename, metadata, arrays)
+    shutil.rmtree(checkpoint_directory, ignore_errors=True)
+    return arrays
+
+
+def get_all_feedback_patterns(guesses, answers):
+    '''
+    Calculate the feedback pattern (see get_feedback_matrix) of every legal guess for every answer.
+
+    The patterns are cached in the same way as expected guess scores, with one row per answer
+    (so the patterns of all the guesses for a subset of the answers can be read quickly).
+    '''
+    import shutil
+    table = 'feedback_patterns'
+    key = get_cache_key(table, guesses, answers)
+    filename = get_cache_filename(table, key)
+    checkpoint_directory = filename + '.partial'
+    cache = read_score_cache(filename)
+    if cache is not None and cache[0].get('key') == key:
+        print(f"Loading feedback patterns from '{filename}'")
+        count_work('cache_hits')
+        return cache[1]['patterns']
+    print(f"Calculating feedback patterns (saving to '{filename}')")
+    count_work('cache_misses')
+    def progress(num_done, num_total):
+        sys.stdout.write(f"{int(100 * num_done / num_total)}% ")
+        sys.stdout.flush()
+    # with a memory limit, the patterns are kept in a memory-mapped file until they are saved (transposed)
+    patterns, = score_guesses_in_chunks(get_feedback_patterns, encode_words(guesses), encode_words(answers),
+            checkpoint_directory=checkpoint_directory, progress=progress, jobs=JOBS)
+    print('')
+    arrays = {
+        'words': encode_words(guesses),
+        'answers': encode_words(answers),
+        'patterns': patterns.T,
+    }
+    metadata = {'table': table, 'key': key, 'scoring_version': SCORING_VERSION,
+            'word_length': WORD_LENGTH, 'alphabet': ALPHABET, 'num_guesses': len(guesses),
+            'num_answers': len(answers)}
+    write_score_cache(filename, metadata, arrays)
+    shutil.rmtree(checkpoint_directory, ignore_errors=True)
+    return read_score_cache(filename)[1]['patterns']
+
+
+def make_score_table(expected_guess_scores):
+    '''
+    Build a table of scores (see load_score_table) from a list of expected scores.
+    '''
+    words = [guess.word for guess in expected_guess_scores]
+    def column(name):
+        return np.array([getattr(guess, name) for guess in expected_guess_scores])
+    partition_columns = []
+    if len(expected_guess_scores) > 0 and expected_guess_scores[0].entropy is not None:
+        partition_columns = [column('entropy'), column('expected_remaining'), column('max_bucket')]
+    return ScoreTable(words, encode_words(words), column('greens').astype(np.float64),
+            column('yellows').astype(np.float64), column('total').astype(np.float64), *partition_columns)
+
+
+def get_expected_scores(table, rows=None):
+    '''
+    Get the expected scores of every guess in a table of scores (see load_score_table), or of the guesses in the
+    given rows (an array of indices), as a list.
+    '''
+    columns = [table.greens, table.yellows, table.total]
+    if table.entropy is not None:
+        columns += [table.entropy, table.expected_remaining, table.max_bucket]
+    if rows is None:
+        return list(map(ExpectedScore, table.words, *(column.tolist() for column in columns)))
+    return list(map(ExpectedScore, map(table.words.__getitem__, rows.tolist()),
+            *(column[rows].tolist() for column in columns)))
+
+
+def get_weighted_score(guess):
+    '''
+    Calculate the weighted score for a guess (given it's expected green and yellow scores).
+    '''
+    return guess.greens * GREEN_MULTIPLIER + guess.yellows
+
+
+def get_metric_value(guess):
+    '''
+    Get the value of the chosen metric for a guess.
+    '''
+    if METRIC == 'weighted':
+        return get_weighted_score(guess)
+    return getattr(guess, METRIC.replace('-', '_'))
+
+
+def get_ranking_score(guess):
+    '''
+    Calculate the score used to rank a guess by the chosen metric, where higher scores are better.
+    '''
+    if METRIC in ('expected-remaining', 'max-bucket'):
+        return -get_metric_value(guess)
+    return get_metric_value(guess)
+
+
+def get_ranking_scores(table):
+    '''
+    Calculate the scores used to rank every guess in a table of scores (see get_ranking_score), as an array
+    (or as a list, for a table of memoryviews).
+    '''
+    if METRIC == 'weighted' and isinstance(table.greens, memoryview):
+        return [greens * GREEN_MULTIPLIER + yellows for greens, yellows in zip(table.greens, table.yellows)]
+    if METRIC == 'weighted':
+        return table.greens * GREEN_MULTIPLIER + table.yellows
+    values = np.asarray(getattr(table, METRIC.replace('-', '_')), dtype=np.float64)
+    return -values if METRIC in ('expected-remaining', 'max-bucket') else values
+
+
+GUESS_ORDERINGS = {
+    'greens': attrgetter('greens'),
+    'yellows': attrgetter('yellows'),
+    'total': attrgetter('total'),
+    'ranking': get_ranking_scores,
+}
+
+
+def build_guess_index(scores):
+    '''
+    Index the expected scores of the guesses (a table of scores, or a list of expected scores), to find the top
+    guesses by any of GUESS_ORDERINGS quickly.
+
+    The index holds the letter mask and number of distinct letters of each guess, and the indices of the guesses
+    sorted by each ordering (best first, keeping the original order of guesses with equal scores), which only
+    have to be sorted once however many top guesses are found. Given a list, the guesses found are taken from it;
+    given a table, they are built from the table as they are found.
+
+    A table of memoryviews (see load_score_table) is indexed without numpy, with lists in place of arrays.
+    '''
+    guesses = None
+    if not isinstance(scores, ScoreTable):
+        guesses, scores = scores, make_score_table(scores)
+    if isinstance(scores.greens, memoryview):
+        letter_bits = {letter: 1 << code for code, letter in enumerate(ALPHABET)}
+        masks = [reduce(or_, map(letter_bits.__getitem__, guess_word)) for guess_word in scores.words]
+        num_letters = [bin(mask).count('1') for mask in masks]
+        # a stable sort in reverse keeps guesses with equal scores in their original order, as argsort does below
+        orderings = {name: sorted(range(len(scores.words)), key=key(scores).__getitem__, reverse=True)
+                for name, key in GUESS_ORDERINGS.items()}
+        return GuessIndex(guesses, scores, masks, num_letters, orderings)
+    masks = get_letter_masks(scores.codes)
+    sorted_codes = np.sort(scores.codes, axis=1)
+    num_letters = 1 + np.count_nonzero(sorted_codes[:, 1:] != sorted_codes[:, :-1], axis=1)
+    orderings = {name: np.argsort(-np.asarray(key(scores), dtype=np.float64), kind='stable')
+            for name, key in GUESS_ORDERINGS.items()}
+    return GuessIndex(guesses, scores, masks, num_letters, orderings)
+
+
+def iter_top_guesses(index, ordering, excluded_mask=0, max_duplicates=None, included=None):
+    '''
+    Generate the guesses in an index (see build_guess_index) from best to worst by one of its orderings, skipping
+    those that use any of the excluded letters (given as a mask), that have more than max_duplicates duplicated
+    letters (if given) or that are not included (if given as an array of flags, one per guess).
+
+    The guesses are checked in blocks of growing size, so finding the first few costs little more than their block
+    (or one at a time, for an index of lists).
+    '''
+    order = index.orderings[ordering]
+    if isinstance(order, list):
+        scores = index.scores
+        columns = [scores.greens, scores.yellows, scores.total]
+        if scores.entropy is not None:
+            columns += [scores.entropy, scores.expected_remaining, scores.max_bucket]
+        for row in order:
+            if index.masks[row] & excluded_mask or \
+                    (max_duplicates is not None and index.num_letters[row] < WORD_LENGTH - max_duplicates) or \
+                    (included is not None and not included[row]):
+                continue
+            yield index.guesses[row] if index.guesses is not None else \
+                    ExpectedScore(scores.words[row], *(column[row] for column in columns))
+        return
+    start, block_size = 0, 64
+    while start < len(order):
+        block = order[start:start + block_size]
+        ok = index.masks[block] & excluded_mask == 0
+        if max_duplicates is not None:
+            ok &= index.num_letters[block] >= WORD_LENGTH - max_duplicates
+        if included is not None:
+            ok &= included[block]
+        if index.guesses is not None:
+            yield from map(index.guesses.__getitem__, block[ok].tolist())
+        else:
+            yield from get_expected_scores(index.scores, block[ok])
+        start += block_size
+        block_size *= 2
+
+
+def find_top_guesses(index, ordering, k, excluded_mask=0, max_duplicates=None, included=None):
+    '''
+    Find the k best guesses in an index by one of its orderings (see iter_top_guesses).
+    '''
+    return list(islice(iter_top_guesses(index, ordering, excluded_mask, max_duplicates, included), k))
+
+
+def get_ideal_weighted_guess_scores(expected_guess_scores, index=None):
+    '''
+    Calculate the sequence of 'ideal' guesses that maximize the total weighted score (or rank best by the chosen
+    metric) at each step and do not repeat letters from previous guesses. All legal guesses are considered.
+    '''
+    if index is None:
+        index = build_guess_index(expected_guess_scores)
+    letters_used = 0
+    best_guesses = []
+    while True:
+        top_scores = find_top_guesses(index, 'ranking', 1, excluded_mask=letters_used)
+        if len(top_scores) == 0:
+            break
+        best_guesses.append(top_scores[0])
+        letters_used |= get_letters_mask(top_scores[0].word)
+    return best_guesses
+    
+
+def relabel_feedback_groups(codes):
+    '''
+    Relabel the combined feedback codes in each row of a matrix with small numbers (0 to one less than the number
+    of distinct codes in the row), keeping answers in the same groups.
+    '''
+    order = np.argsort(codes, axis=1)
+    sorted_codes = np.take_along_axis(codes, order, axis=1)
+    labels = np.zeros_like(codes)
+    labels[:, 1:] = np.cumsum(sorted_codes[:, 1:] != sorted_codes[:, :-1], axis=1)
+    np.put_along_axis(codes, order, labels, axis=1)
+    return codes
+
+
+def get_joint_partition_scores(guess_sequences, answers):
+    '''
+    Calculate how well each sequence of guesses splits the answers into groups together: the answers in each group
+    receive the same feedback for every guess in the sequence (so they could not yet be told apart).
+
+    Returns the number of groups, the expected number of answers remaining after all the guesses (the expected
+    size of the group the answer is in) and the share of answers identified (alone in their group), for each
+    sequence. The feedback for each distinct guess is only calculated once, and the combined feedback of the
+    sequences is calculated a block of sequences at a time, sorted and measured together.
+    '''
+    guess_words = sorted(set(guess_word for guess_sequence in guess_sequences for guess_word in guess_sequence))
+    rows = {guess_word: row for row, guess_word in enumerate(guess_words)}
+    answer_codes = answers if isinstance(answers, np.ndarray) else encode_words(answers)
+    num_answers = len(answer_codes)
+    num_patterns = 3 ** WORD_LENGTH
+    # shorter sequences are padded with a guess that gives the same feedback for every answer
+    feedback = np.zeros((len(guess_words) + 1, num_answers), dtype=np.int64)
+    feedback[:-1] = get_feedback_matrix(encode_words(guess_words), answer_codes)
+    sequence_rows = np.full((len(guess_sequences), max(map(len, guess_sequences), default=0)), len(guess_words))
+    for i, guess_sequence in enumerate(guess_sequences):
+        sequence_rows[i, 0:len(guess_sequence)] = [rows[guess_word] for guess_word in guess_sequence]
+    num_groups = np.zeros(len(guess_sequences), dtype=np.int64)
+    expected_remaining = np.zeros(len(guess_sequences))
+    identified = np.zeros(len(guess_sequences))
+    for start in range(0, len(guess_sequences), JOINT_BLOCK_SIZE):
+        block = sequence_rows[start:start + JOINT_BLOCK_SIZE]
+        codes = np.zeros((len(block), num_answers), dtype=np.int64)
+        num_codes = 1
+        for column in block.T:
+            if num_codes * num_patterns >= 2 ** 62:
+                codes = relabel_feedback_groups(codes)
+                num_codes = num_answers
+            codes = codes * num_patterns + feedback[column]
+            num_codes *= num_patterns
+        codes.sort(axis=1)
+        group_starts = np.ones(codes.shape, dtype=bool)
+        group_starts[:, 1:] = codes[:, 1:] != codes[:, :-1]
+        group_starts = np.flatnonzero(group_starts)
+        sizes = np.diff(np.append(group_starts, codes.size))
+        group_sequences = group_starts // max(1, num_answers)
+        end = start + len(block)
+        num_groups[start:end] = np.bincount(group_sequences, minlength=len(block))
+        expected_remaining[start:end] = np.bincount(group_sequences, weights=sizes * sizes,
+                minlength=len(block)) / num_answers
+        identified[start:end] = np.bincount(group_sequences, weights=sizes == 1, minlength=len(block)) / num_answers
+    count_work('joint_sequences_scored', len(guess_sequences))
+    return num_groups, expected_remaining, identified
+
+
+def format_joint_scores(num_groups, expected_remaining, identified):
+    '''
+    Format the joint partition scores of a sequence of guesses (see get_joint_partition_scores) for display.
+    '''
+    return f"{num_groups} groups | {expected_remaining:0.2f} left | {identified:0.1%} identified"
+
+
+def get_letter_prices(letter_bits, scores, allowed_mask, num_guesses, num_letters):
+    '''
+    Choose a price for each allowed letter, so that the best total score of any num_guesses masks that use no letter
+    more than once is at most the total price of the num_letters * num_guesses most expensive letters, plus the
+    highest num_guesses scores less the prices of their letters (see get_price_bound).
+
+    This holds for any prices that are not negative, and the prices are chosen to make the bound as tight as they
+    can, by following its subgradient for a fixed number of steps from sharing the best score of each letter's
+    masks equally among their letters. Returns the prices, with a price of 0 for letters that are not allowed.
+    '''
+    allowed = ((allowed_mask >> np.arange(letter_bits.shape[1])) & 1).astype(bool)
+    num_used = min(num_letters * num_guesses, int(allowed.sum()))
+    if len(scores) < num_guesses or num_used == 0:
+        return np.zeros(letter_bits.shape[1])
+    prices = np.where(allowed & letter_bits.any(axis=0),
+            (letter_bits * scores[:, None]).max(axis=0, initial=0.0), 0.0) / num_letters
+    best_prices, best_bound = prices, math.inf
+    step = LETTER_PRICE_STEP * scores.max() / num_letters
+    for _ in range(LETTER_PRICE_ITERATIONS):
+        reduced_scores = scores - letter_bits @ prices
+        top_masks = np.argpartition(-reduced_scores, num_guesses - 1)[:num_guesses]
+        top_letters = np.argsort(-np.where(allowed, prices, -math.inf), kind='stable')[:num_used]
+        bound = prices[top_letters].sum() + reduced_scores[top_masks].sum()
+        if bound < best_bound:
+            best_prices, best_bound = prices, bound
+        # letters counted in the bound but not used by the best masks are overpriced, and those used are underpriced
+        gradient = -letter_bits[top_masks].sum(axis=0).astype(np.float64)
+        gradient[top_letters] += 1
+        prices = np.where(allowed, np.maximum(0.0, prices - step * gradient), 0.0)
+        step *= LETTER_PRICE_DECAY
+    return best_prices
+
+
+def search_disjoint_letter_masks(masks, scores, allowed_mask, num_guesses, on_result):
+    '''
+    Search for the combinations of letter masks with the highest total scores that use no letter more than once.
+
+    Each mask must have the same number of letters, and only use letters in the allowed mask. The masks must be
+    sorted by score, from highest to lowest. Each combination is found exactly once, by repeatedly choosing
+    the unused allowed letter contained in the fewest remaining masks, and either choosing a mask containing it
+    or (if enough allowed letters remain) leaving it unused.
+
+    on_result is called with the indices of the masks in each combination found, and returns the total score
+    that a combination must now exceed to be of interest. Branches that cannot exceed it, even using the highest
+    remaining scores, are pruned. Returns the number of search nodes visited and pruned.
+    '''
+    masks = np.asarray(masks, dtype=np.int64)
+    scores = np.asarray(scores, dtype=np.float64)
+    letter_bits = (masks[:, None] >> np.arange(len(ALPHABET))) & 1
+    num_letters = bin(int(masks[0])).count('1') if len(masks) > 0 else WORD_LENGTH
+    state = {'threshold': -math.inf, 'visited': 0, 'pruned': 0}
+    # upper bounds on the best remaining score from each node, which only depends on the letters already closed
+    completion_bounds = {}
+    prices = get_letter_prices(letter_bits, scores, allowed_mask, num_guesses, num_letters)
+    reduced_scores = scores - letter_bits @ prices
+
+    def get_price_bound(closed_mask, candidates, num_remaining):
+        '''
+        Bound the best remaining score by the prices of the most expensive open letters that the remaining masks
+        would use, plus the best remaining scores less the prices of their letters (see get_letter_prices).
+        '''
+        open_prices = prices[((allowed_mask & ~closed_mask) >> np.arange(len(prices))) & 1 == 1]
+        if len(open_prices) < num_remaining * num_letters:
+            return -math.inf
+        top_prices = np.partition(open_prices, len(open_prices) - num_remaining * num_letters)
+        top_scores = np.partition(reduced_scores[candidates], len(candidates) - num_remaining)
+        # a little slack, so that rounding errors cannot prune a combination the bound is exact for
+        return top_prices[-num_remaining * num_letters:].sum() + top_scores[-num_remaining:].sum() + 1e-9
+
+    def search(closed_mask, num_spare, candidates, num_remaining, score, chosen):
+        '''
+        Search the combinations completing the chosen masks, returning an upper bound on the best remaining score.
+        '''
+        state['visited'] += 1
+        if num_remaining == 0:
+            state['threshold'] = on_result(chosen)
+            return 0.0
+        if len(candidates) < num_remaining:
+            return -math.inf
+        if num_remaining == 1:
+            # any remaining candidate completes the combination, so there is no need to branch on letters
+            for idx in candidates:
+                if score + scores[idx] <= state['threshold']:
+                    state['pruned'] += 1
+                    break
+                state['visited'] += 1
+                state['threshold'] = on_result(chosen + [idx])
+            return scores[candidates[0]]
+        key = (closed_mask, num_spare, num_remaining)
+        if key in completion_bounds and score + completion_bounds[key] <= state['threshold']:
+            state['pruned'] += 1
+            return completion_bounds[key]
+        price_bound = get_price_bound(closed_mask, candidates, num_remaining)
+        if score + price_bound <= state['threshold']:
+            state['pruned'] += 1
+            completion_bounds[key] = price_bound
+            return price_bound
+        if num_remaining == 2:
+            # only candidates that could beat the threshold with the best possible partner are worth pairing up,
+            # and if there are not too many of them, every disjoint pair of them can be checked at once
+            limit = state['threshold'] - score
+            contenders = candidates[scores[candidates] > limit - scores[candidates[0]]]
+            if len(contenders) <= PAIR_SEARCH_LIMIT:
+                pair_scores = scores[contenders, None] + scores[None, contenders]
+                is_pair = ((masks[contenders, None] & masks[None, contenders]) == 0) & (pair_scores > limit)
+                firsts, seconds = np.nonzero(is_pair)
+                firsts, seconds = firsts[firsts < seconds], seconds[firsts < seconds]
+                bound = limit
+                for pair in np.argsort(-pair_scores[firsts, seconds], kind='stable'):
+                    pair_score = pair_scores[firsts[pair], seconds[pair]]
+                    bound = max(bound, pair_score)
+                    if score + pair_score <= state['threshold']:
+                        state['pruned'] += 1
+                        break
+                    state['visited'] += 1
+                    state['threshold'] = on_result(chosen + [contenders[firsts[pair]], contenders[seconds[pair]]])
+                completion_bounds[key] = bound
+                return bound
+        # bound the remaining score by sharing the score of each mask equally among its letters: the share
+        # of each letter is at most the best score of any remaining candidate containing it
+        bits = letter_bits[candidates]
+        counts = bits.sum(axis=0)
+        if np.count_nonzero(counts) < num_remaining * num_letters:
+            return -math.inf
+        letter_best = np.where(counts > 0, scores[candidates[bits.argmax(axis=0)]], 0.0)
+        letter_bound = np.sort(letter_best)[-num_remaining * num_letters:].sum() / num_letters
+        bound = min(letter_bound, scores[candidates[:num_remaining]].sum(), price_bound)
+        if score + bound <= state['threshold']:
+            state['pruned'] += 1
+            completion_bounds[key] = bound
+            return bound
+        # branch on the open letter contained in the fewest remaining candidates
+        open_letters = [i for i in range(len(ALPHABET)) if (allowed_mask & ~closed_mask) >> i & 1]
+        letter = min(open_letters, key=lambda i: counts[i])
+        has_letter = bits[:, letter] == 1
+        with_letter = candidates[has_letter]
+        without_letter = candidates[~has_letter]
+        node_bound = bound
+        bound = -math.inf
+        if num_spare > 0:
+            # high scoring combinations tend to leave out the rarest letters, so try that first
+            bound = search(closed_mask | (1 << letter), num_spare - 1, without_letter, num_remaining, score, chosen)
+        best_rest = scores[without_letter[:num_remaining - 1]].sum()
+        for idx in with_letter:
+            if score + scores[idx] + best_rest <= state['threshold']:
+                state['pruned'] += 1
+                bound = max(bound, scores[idx] + best_rest)
+                break
+            mask = masks[idx]
+            child_key = (closed_mask | int(mask), num_spare, num_remaining - 1)
+            if child_key in completion_bounds and \
+                    score + scores[idx] + completion_bounds[child_key] <= state['threshold']:
+                state['pruned'] += 1
+                bound = max(bound, scores[idx] + completion_bounds[child_key])
+                continue
+            bound = max(bound, scores[idx] + search(
+                    closed_mask | int(mask), num_spare, without_letter[(masks[without_letter] & mask) == 0],
+                    num_remaining - 1, score + scores[idx], chosen + [idx]))
+        completion_bounds[key] = min(bound, node_bound)
+        return completion_bounds[key]
+
+    num_spare = bin(allowed_mask).count('1') - num_guesses * num_letters
+    if num_spare >= 0:
+        search(0, num_spare, np.arange(len(masks)), num_guesses, 0.0, [])
+    return state['visited'], state['pruned']
+
+
+def find_optimal_guess_combinations(expected_guess_scores, allowed_letters, num_guesses, num_results=1,
+        limit_guesses_to=None, on_improvement=None):
+    '''
+    Find the combinations of guesses with the highest total weighted scores, within the given constraints.
+
+    Guesses must only use the allowed letters, without duplicating letters within or between guesses.
+    Guesses that use the same set of letters are considered together while searching.
+    If given, on_improvement is called with the score and guesses of each new best combination as it is found.
+    Returns a list of (score, guesses) for the best combinations, from best to worst, followed by the number
+    of guesses and distinct sets of letters considered, and the number of search nodes visited and pruned.
+    '''
+    allowed_mask = sum(1 << ALPHABET.index(letter) for letter in set(allowed_letters))
+    possible_guesses = expected_guess_scores
+    if limit_guesses_to:
+        limit_guesses_to = set(limit_guesses_to)
+        possible_guesses = [guess for guess in possible_guesses if guess.word in limit_guesses_to]
+    guess_masks = get_letter_masks(encode_words(guess.word for guess in possible_guesses)).tolist()
+    # group guesses by their set of letters, keeping only those with no duplicated or disallowed letters
+    guesses_by_mask = {}
+    for guess, mask in zip(possible_guesses, guess_masks):
+        if mask & ~allowed_mask == 0 and bin(mask).count('1') == WORD_LENGTH:
+            guesses_by_mask.setdefault(mask, []).append(guess)
+    for guesses in guesses_by_mask.values():
+        guesses.sort(key=get_weighted_score, reverse=True)
+    masks = sorted(guesses_by_mask, key=lambda mask: get_weighted_score(guesses_by_mask[mask][0]), reverse=True)
+    scores = [get_weighted_score(guesses_by_mask[mask][0]) for mask in masks]
+
+    results = []
+    def on_result(chosen):
+        # expand a combination of letter sets into every combination of the guesses using them
+        for guesses in product(*(guesses_by_mask[masks[idx]] for idx in chosen)):
+            score = sum(get_weighted_score(guess) for guess in guesses)
+            if on_improvement and (len(results) == 0 or score > results[0][0]):
+                on_improvement(score, guesses)
+            results.append((score, guesses))
+            results.sort(key=itemgetter(0), reverse=True)
+        del results[num_results:]
+        return results[-1][0] if len(results) >= num_results else -math.inf
+
+    visited, pruned = search_disjoint_letter_masks(masks, scores, allowed_mask, num_guesses, on_result)
+    count_work('combinations_visited', visited)
+    count_work('combinations_pruned', pruned)
+    num_considered = sum(len(guesses) for guesses in guesses_by_mask.values())
+    return results, num_considered, len(masks), visited, pruned
+
+
+def seek_optimal_guesses_within_constraints(expected_guess_scores, allowed_letters, limit_guesses_to=None,
+        num_guesses=None, num_results=1, joint_answers=None):
+    '''
+    Try to determine what the optimal guesses would be within the given constraints.
+    
+    Guesses must use all of the allowed letters, without duplicating letters. By default, as many guesses
+    as the allowed letters permit are sought, or fewer if no such combination of guesses exists.
+    If answers are given in joint_answers, the best combinations (by total weighted score) are then reranked by
+    how well they split those answers together (see get_joint_partition_scores), fewest answers remaining first.
+    '''
+    do_not_warn = False
+    if allowed_letters == '':
+        allowed_letters = ALPHABET
+        do_not_warn = True
+    allowed_letters = set(allowed_letters)
+    print(coloured(f"\nSeeking optimal guesses using letters " + \
+            f"{' '.join(l.upper() for l in sorted(allowed_letters))}", attrs=['bold']))
+    if len(allowed_letters) % WORD_LENGTH != 0 and not do_not_warn:
+        print(coloured(
+                "WARNING: The set of allowed letters is not evenly divisible by the word length",
+                'red', attrs=['bold']))
+    num_guesses = num_guesses or int(len(allowed_letters) / WORD_LENGTH)
+
+    def on_improvement(score, guesses):
+        print(coloured(f"{' '.join(g.word for g in guesses)}: {score:0.6f}", attrs=['bold']))
+    results = []
+    while num_guesses > 0:
+        results, num_possible, num_letter_sets, visited, pruned = find_optimal_guess_combinations(
+                expected_guess_scores, allowed_letters, num_guesses, num_results=num_results,
+                limit_guesses_to=limit_guesses_to, on_improvement=on_improvement)
+        print(f"Considered {num_possible} possible guesses ({num_letter_sets} distinct sets of letters) " + \
+                f"for combinations of {num_guesses} guesses, visiting {visited} search nodes ({pruned} pruned)")
+        if len(results) > 0:
+            break
+        print(coloured(f"No combinations of {num_guesses} guesses meet the chosen criteria", 'red'))
+        num_guesses -= 1
+    if len(results) == 0:
+        return None
+    if joint_answers is not None:
+        start = time.perf_counter()
+        joint_scores = list(zip(*(scores.tolist() for scores in get_joint_partition_scores(
+                [[g.word for g in guesses] for _, guesses in results], joint_answers))))
+        elapsed = time.perf_counter() - start
+        order = sorted(range(len(results)),
+                key=lambda i: (joint_scores[i][1], -joint_scores[i][2], -results[i][0]))
+        results = [results[i] + (joint_scores[i],) for i in order]
+        print(coloured(f"Top {len(results)} combinations of {num_guesses} guesses, reranked by how well they " +
+                f"split the answers together ({1000 * elapsed:0.1f} ms):", attrs=['bold']))
+        for rank, (score, guesses, joint_score) in enumerate(results[0:max(PRINTING_NUM_WORDS, num_results)]):
+            print(f"{rank + 1:>4}. {' '.join(g.word for g in guesses)}: {score:0.6f} " +
+                    f"({format_joint_scores(*joint_score)})")
+    elif num_results > 1:
+        print(coloured(f"Top {len(results)} combinations of {num_guesses} guesses:", attrs=['bold']))
+        for rank, (score, guesses) in enumerate(results):
+            print(f"{rank + 1:>4}. {' '.join(g.word for g in guesses)}: {score:0.6f}")
+    return [g.word for g in results[0][1]]
+
+
+def print_letters_by_frequency(answer_letter_freqs):
+    '''
+    Display the letters of the alphabet, sorted by frequency of occurrence.
+    
+    Letter frequencies are displayed for their overall occurrence anywhere in the word,
+    and for their occurrence in each specific position in the word.
+    '''
+    def format_letters_by_frequency(log_freqs, colour, highlight_letters=set(), join_on=" ", block_separator="     "):
+        '''
+        Format letters into sorted blocks (for display) ordered by frequency, with some letters highlighted.
+    
+        Highlighted letters are printed in upper case, while non-highlighted letters are printed in lowercase.
+        '''
+        def get_sorted_letters():
+            sorted_letters = [letter for letter, _ in sorted(log_freqs.items(), key=itemgetter(1), reverse=True)]
+            return [
+                coloured(letter.upper(), colour, attrs=['bold']) if letter in highlight_letters
+                        else coloured(letter.lower(), colour)
+                for letter in sorted_letters]
+        def format_letter_blocks(letters):
+            if len(letters) < len(alphabet):
+                letters += [' '] * (len(alphabet) - len(letters))
+            out = []
+            for i in range(0, len(letters), PRINTING_BLOCK_SIZE):
+                out.append(join_on.join(letters[slice(i, i + PRINTING_BLOCK_SIZE, 1)]))
+            if len(out) == PRINTING_BLOCK_SIZE + 1:
+                out[PRINTING_BLOCK_SIZE - 1] += join_on + out[PRINTING_BLOCK_SIZE]
+                del(out[PRINTING_BLOCK_SIZE])
+            return block_separator.join(out)
+        alphabet = set(ALPHABET)
+        sorted_letters = format_letter_blocks(get_sorted_letters())
+        missing_letters = " ".join(alphabet - set(log_freqs.keys()))
+        missing_letters = coloured(f"[ {missing_letters} ]" if len(missing_letters) > 0 else '', 'red')
+        return f"{sorted_letters}     {missing_letters}"
+
+    planned_guess_letters = set()
+    if PLANNED_GUESSES:
+        for guess in PLANNED_GUESSES:
+            for letter in guess:
+                planned_guess_letters.add(letter)
+    print(coloured("\nLetters in answer words, sorted by frequency from most to least " +
+            "(letters in planned guesses are capitalized)", attrs=['bold']))
+    formatted_letters = format_letters_by_frequency(
+            answer_letter_freqs[0], colour='magenta', highlight_letters=planned_guess_letters)
+    print(coloured(f"In any position:     {formatted_letters}", 'magenta'))
+    for pos in range(1, len(answer_letter_freqs)):
+        formatted_letters = format_letters_by_frequency(
+                answer_letter_freqs[pos], colour='cyan', highlight_letters=planned_guess_letters)
+        print(coloured(f"In position {pos}:       {formatted_letters}", 'cyan'))
+
+
+def print_guesses_with_best_expected_scores(expected_guess_scores, answers, limit_guesses_to=None):
+    '''
+    Display possible guess words with the best expected scores (given as a table of scores, or a list).
+    
+    The best guesses are displayed based on words that will produce the most total greens only,
+    the most total yellows only, and the most total hits (either yellow or green).
+    As well, the best guesses are displayed based on a weighted score
+    where each green is counted as more than one yellow (or based on the chosen metric).
+    '''
+    def format_score_summary(*guesses, ideal_weighted_score=None):
+        w = sum(get_weighted_score(guess) for guess in guesses)
+        g = sum(guess.greens for guess in guesses)
+        y = sum(guess.yellows for guess in guesses)
+        t = sum(guess.total for guess in guesses)
+        weighted_score_diff = f" {w - ideal_weighted_score:0.2f}" if ideal_weighted_score else ''
+        metric_value = ''
+        if METRIC != 'weighted' and len(guesses) == 1 and get_metric_value(guesses[0]) is not None:
+            metric_value = coloured(METRICS[METRIC][1].format(get_metric_value(guesses[0])),
+                    'magenta', attrs=['bold']) + " | "
+        return metric_value + coloured(f"{w:0.2f}{weighted_score_diff}", 'blue', attrs=['bold']) + " | " + \
+                coloured(f"{g:0.2f}", 'green') + " + " + \
+                coloured(f"{y:0.2f}", 'yellow') + " = " + \
+                coloured(f"{t:0.2f}", 'cyan')
+    
+    # def format_planned_guesses(planned_guesses, count):
+    #     formatted_planned_guesses = "' and '".join(PLANNED_GUESSES[0:count+1])
+    
+    def find_possible_guesses(ordering, excluded_mask=0):
+        # only consider guesses that do not include too many duplicated letters,
+        # and that are within the limited set, if specified
+        return find_top_guesses(index, ordering, PRINTING_NUM_WORDS, excluded_mask=excluded_mask,
+                max_duplicates=MAX_DUPLICATE_GUESS_LETTERS, included=included)
+    
+    print("")
+    index = build_guess_index(expected_guess_scores)
+    included = None
+    if limit_guesses_to:
+        limit_guesses_to = set(limit_guesses_to)
+        included = [guess_word in limit_guesses_to for guess_word in index.scores.words]
+    if isinstance(index.num_letters, list):
+        num_possible = sum(num_letters >= WORD_LENGTH - MAX_DUPLICATE_GUESS_LETTERS and ok
+                for num_letters, ok in zip(index.num_letters, included or repeat(True)))
+    else:
+        included = np.array(included, dtype=bool) if included is not None else None
+        possible_guesses = index.num_letters >= WORD_LENGTH - MAX_DUPLICATE_GUESS_LETTERS
+        if included is not None:
+            possible_guesses &= included
+        num_possible = np.count_nonzero(possible_guesses)
+    legal_guess_set = set(index.scores.words)
+    print(f"Considering {num_possible} possible guesses out of {len(legal_guess_set)} legal guesses")
+    
+    ideal_guesses = get_ideal_weighted_guess_scores(expected_guess_scores, index)
+    print("Statistically ideal guesses are: '" + "' and '".join(g.word for g in ideal_guesses) + "'")
+    
+    print(coloured("\nTop scoring initial guesses:", attrs=['bold']))
+    most_greens = find_possible_guesses('greens')
+    most_yellows = find_possible_guesses('yellows')
+    most_total = find_possible_guesses('total')
+    top_weighted = find_possible_guesses('ranking')
+    best_label = f"Best {METRICS[METRIC][0]}:"
+    best_label = coloured(best_label, attrs=['underline']) + ' ' * (25 - len(best_label))
+    print(f"Most Greens:             ({format_score_summary(most_greens[0])}) " + \
+            f"{', '.join(g.word for g in most_greens[0:PRINTING_NUM_WORDS])}")
+    print(f"Most Yellows:            ({format_score_summary(most_yellows[0])}) " + \
+            f"{', '.join(g.word for g in most_yellows[0:PRINTING_NUM_WORDS])}")
+    print(f"Most Total Hits:         ({format_score_summary(most_total[0])}) " + \
+            f"{', '.join(g.word for g in most_total[0:PRINTING_NUM_WORDS])}")
+    print(best_label + \
+            f"({format_score_summary(top_weighted[0])}) " + \
+            f"{', '.join(coloured(g.word, attrs=['underline']) for g in top_weighted[0:PRINTING_NUM_WORDS])}")
+    
+    if PLANNED_GUESSES:
+        planned_guess_scores = [get_expected_guess_score(guess, answers) for guess in PLANNED_GUESSES]
+        joint_scores = list(zip(*(scores.tolist() for scores in get_joint_partition_scores(
+                [PLANNED_GUESSES[0:i+1] for i in range(0, len(PLANNED_GUESSES))], answers))))
+        previous_guess_mask = 0
+        for i in range(0, len(PLANNED_GUESSES)):
+            ideal_weighted_score = sum(get_weighted_score(guess) for guess in ideal_guesses[0:i+1])
+            print(ideal_weighted_score)
+            next_guess = PLANNED_GUESSES[i]
+            previous_guess_mask |= get_letters_mask(PLANNED_GUESSES[i])
+            most_greens_2 = find_possible_guesses('greens', previous_guess_mask)
+            most_yellows_2 = find_possible_guesses('yellows', previous_guess_mask)
+            most_total_2 = find_possible_guesses('total', previous_guess_mask)
+            top_weighted_2 = find_possible_guesses('ranking', previous_guess_mask)
+            formatted_planned_guesses = "' and '".join(PLANNED_GUESSES[0:i+1])
+            print(coloured(f"\nTop scoring guesses after '{formatted_planned_guesses}'     ", attrs=['bold']) + \
+                    format_score_summary(*planned_guess_scores[0:i+1], ideal_weighted_score=ideal_weighted_score) + ":")
+            if len(top_weighted_2) == 0:
+                print(coloured("No legal guesses remain that meet the chosen criteria", 'red'))
+                break
+            if not next_guess in legal_guess_set:
+                print(coloured(
+                        f"WARNING: planned guess '{next_guess}' is not in the set of legal guesses",
+                        'red', attrs=['bold']))
+            print(f"Together:                ({format_joint_scores(*joint_scores[i])})")
+            print(f"Most Greens:             ({format_score_summary(most_greens_2[0])}) " + \
+                    f"{', '.join(g.word for g in most_greens_2[0:PRINTING_NUM_WORDS])}")
+            print(f"Most Yellows:            ({format_score_summary(most_yellows_2[0])}) " + \
+                    f"{', '.join(g.word for g in most_yellows_2[0:PRINTING_NUM_WORDS])}")
+            print(f"Most Total Hits:         ({format_score_summary(most_total_2[0])}) " + \
+                    f"{', '.join(g.word for g in most_total_2[0:PRINTING_NUM_WORDS])}")
+            print(best_label + \
+                    f"({format_score_summary(top_weighted_2[0])}) " + \
+                    f"{', '.join(coloured(g.word, attrs=['underline']) for g in top_weighted_2[0:PRINTING_NUM_WORDS])}")
+
+
+# the scores used to evaluate sequences of guesses in a worker process (set once, when the worker starts)
+WORKER_BATCH_SCORES = None
+
+
+def init_batch_worker(scores_by_word, answer_codes, ideal_weighted_scores, green_multiplier, output_format):
+    '''
+    Prepare a worker process (or this process) to evaluate sequences of guesses (see evaluate_sequence_block),
+    given the expected scores of the legal guesses, the encoded answers (to score other words), the total weighted
+    scores of the first n ideal guesses, the green multiplier and the format of the results.
+    '''
+    global BATCH_FORMAT, GREEN_MULTIPLIER, WORKER_BATCH_SCORES
+    BATCH_FORMAT = output_format
+    GREEN_MULTIPLIER = green_multiplier
+    # the scores of each guess are kept in the order they are written, ready to be added up
+    WORKER_BATCH_SCORES = ({guess_word: (get_weighted_score(guess), guess.greens, guess.yellows, guess.total)
+            for guess_word, guess in scores_by_word.items()}, answer_codes, ideal_weighted_scores)
+    get_unlisted_guess_score.cache_clear()
+
+
+@lru_cache(maxsize=BATCH_SCORE_CACHE_SIZE)
+def get_unlisted_guess_score(guess_word):
+    '''
+    Calculate the scores of a word that is not a legal guess, against the answers of the worker process
+    (in the same form as the scores of legal guesses, see init_batch_worker).
+    '''
+    guess = get_expected_guess_score(guess_word, WORKER_BATCH_SCORES[1])
+    return (get_weighted_score(guess), guess.greens, guess.yellows, guess.total)
+
+
+def evaluate_guess_sequence(line):
+    '''
+    Evaluate a sequence of planned guesses (separated by spaces or commas) as print_guesses_with_best_expected_scores
+    does, using the expected scores of the worker process, and only calculating the scores of unlisted words.
+
+    Returns a dictionary with the guesses, their combined scores, how far their weighted score is from that of
+    the same number of ideal guesses, and the guesses that are not legal guesses (or an error for invalid words).
+    '''
+    scores_by_word, _, ideal_weighted_scores = WORKER_BATCH_SCORES
+    guess_words = line.replace(',', ' ').lower().split()
+    scores = [scores_by_word.get(guess_word) for guess_word in guess_words]
+    unlisted = [guess_word for guess_word, guess in zip(guess_words, scores) if guess is None]
+    invalid_words = [guess_word for guess_word in unlisted
+            if len(guess_word) != WORD_LENGTH or not set(guess_word) <= set(ALPHABET)]
+    if len(guess_words) == 0 or len(invalid_words) > 0:
+        return {'guesses': guess_words,
+                'error': f"guesses should be {WORD_LENGTH} letters: '{' '.join(invalid_words)}'"}
+    if len(unlisted) > 0:
+        scores = [guess or get_unlisted_guess_score(guess_word) for guess_word, guess in zip(guess_words, scores)]
+    weighted_score, greens, yellows, total = (sum(column) for column in zip(*scores))
+    return {
+        'guesses': guess_words,
+        'weighted_score': weighted_score,
+        'greens': greens,
+        'yellows': yellows,
+        'total': total,
+        'ideal_difference': weighted_score - ideal_weighted_scores[len(scores) - 1]
+                if len(scores) <= len(ideal_weighted_scores) else None,
+        'unlisted': unlisted,
+    }
+
+
+BATCH_FIELDS = ['guesses', 'weighted_score', 'greens', 'yellows', 'total', 'ideal_difference', 'unlisted', 'error']
+
+
+def evaluate_sequence_block(lines):
+    '''
+    Evaluate a block of sequences of planned guesses (see evaluate_guess_sequence), in a worker process.
+
+    The results are formatted in the worker too (as rows of CSV or JSON lines), and returned as a single string
+    together with the number of sequences evaluated.
+    '''
+    import csv
+    results = [evaluate_guess_sequence(line) for line in lines]
+    if BATCH_FORMAT == 'jsonl':
+        return ''.join(json.dumps(result) + '\n' for result in results), len(results)
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerows([' '.join(result[field]) if isinstance(result.get(field), list) else result.get(field, '')
+            for field in BATCH_FIELDS] for result in results)
+    return out.getvalue(), len(results)
+
+
+def iter_evaluated_sequence_blocks(blocks, initargs, jobs=1):
+    '''
+    Evaluate blocks of sequences of planned guesses, yielding the formatted results of each block (with the number
+    of sequences in it) in the order given.
+
+    With more than one job, the blocks are evaluated in a pool of worker processes, prepared with the given
+    arguments (see init_batch_worker). Only a few blocks are read ahead of the one being yielded, so the memory used
+    does not grow with the number of blocks.
+    '''
+    from concurrent.futures import ProcessPoolExecutor
+    if jobs <= 1:
+        init_batch_worker(*initargs)
+        for block in blocks:
+            yield evaluate_sequence_block(block)
+        return
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_batch_worker, initargs=initargs) as pool:
+        pending = deque()
+        for block in blocks:
+            pending.append(pool.submit(evaluate_sequence_block, block))
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def evaluate_guess_sequences(expected_guess_scores, answers, source, output_format=None):
+    '''
+    Evaluate sequences of planned guesses read from a file (or standard input, if the source is '-'),
+    one sequence per line, writing the results to standard output (as CSV or JSON lines) in the same order.
+
+    The file is read and evaluated in blocks of lines (see iter_evaluated_sequence_blocks), so that any number
+    of sequences can be evaluated in constant memory.
+    '''
+    import csv
+    output_format = output_format or BATCH_FORMAT
+    ideal_weighted_scores = np.cumsum(
+            [get_weighted_score(guess) for guess in get_ideal_weighted_guess_scores(expected_guess_scores)]).tolist()
+    initargs = ({guess.word: guess for guess in expected_guess_scores}, encode_words(answers), ideal_weighted_scores,
+            GREEN_MULTIPLIER, output_format)
+    out = sys.__stdout__
+    if output_format == 'csv':
+        csv.writer(out, lineterminator='\n').writerow(BATCH_FIELDS)
+    num_sequences = 0
+    with (open(source, 'r') if source != '-' else nullcontext(sys.stdin)) as lines:
+        lines = (line for line in lines if line.strip())
+        blocks = iter(lambda: list(islice(lines, BATCH_BLOCK_SIZE)), [])
+        for text, num_block_sequences in iter_evaluated_sequence_blocks(blocks, initargs, JOBS):
+            out.write(text)
+            num_sequences += num_block_sequences
+            count_work('sequences_evaluated', num_block_sequences)
+    out.flush()
+    print(f"Evaluated {num_sequences} sequences of planned guesses")
+
+
+def get_upper_frontier(greens, yellows, ids):
+    '''
+    Find the guesses (among the given ids) on the upper convex hull of their (greens, yellows) points, in order of
+    increasing greens, which are the only guesses that can have the best weighted score for some green multiplier.
+
+    Returns the ids of the guesses on the frontier and the breakpoints between them: the i-th guess has the best
+    weighted score for multipliers between the (i-1)-th and i-th breakpoints, which are in increasing order.
+    Of guesses with the same point, the one with the lowest id is kept.
+    '''
+    hull = []
+    last_greens = None
+    for i in ids[np.lexsort((ids, -yellows[ids], greens[ids]))].tolist():
+        if greens[i] == last_greens:
+            # this guess has as many greens as the previous one, but no more yellows
+            continue
+        last_greens = greens[i]
+        while len(hull) >= 2 and (greens[hull[-1]] - greens[hull[-2]]) * (yellows[i] - yellows[hull[-2]]) >= \
+                (yellows[hull[-1]] - yellows[hull[-2]]) * (greens[i] - greens[hull[-2]]):
+            hull.pop()
+        hull.append(i)
+    breakpoints = [(yellows[a] - yellows[b]) / (greens[b] - greens[a]) for a, b in zip(hull, hull[1:])]
+    return hull, breakpoints
+
+
+def get_frontier_segments(greens, yellows, ids, low, high):
+    '''
+    Split the range of green multipliers from low to high into segments where a single guess (among the given ids)
+    has the best weighted score, returned as (start, end, id of the best guess).
+    '''
+    hull, breakpoints = get_upper_frontier(greens, yellows, ids)
+    first, last = bisect_left(breakpoints, low), bisect_left(breakpoints, high)
+    segments = []
+    start = low
+    for i in range(first, last):
+        if breakpoints[i] > start:
+            segments.append((start, breakpoints[i], hull[i]))
+            start = breakpoints[i]
+    segments.append((start, high, hull[last]))
+    return merge_segments(segments)
+
+
+def merge_segments(segments):
+    '''
+    Merge each segment of a sweep (as (start, end, ids)) into the one before it if it has the same ids. A segment
+    no wider than SWEEP_EPSILON (as left by rounding errors where several guesses cross at almost the same
+    multiplier) is merged into the one after it instead, so that the ids at a crossing are those just after it,
+    or into the one before it if it is the last.
+    '''
+    merged = []
+    for start, end, ids in segments:
+        if merged and merged[-1][1] - merged[-1][0] <= SWEEP_EPSILON:
+            start = merged.pop()[0]
+        if merged and ids == merged[-1][2]:
+            merged[-1] = (merged[-1][0], end, ids)
+        else:
+            merged.append((start, end, ids))
+    if len(merged) > 1 and merged[-1][1] - merged[-1][0] <= SWEEP_EPSILON:
+        end = merged.pop()[1]
+        merged[-1] = (merged[-1][0], end, merged[-1][2])
+    return merged
+
+
+def sweep_ideal_guesses(greens, yellows, masks, low, high, excluded_mask=0, chosen=()):
+    '''
+    Split the range of green multipliers from low to high into segments where the ideal guesses (as found by
+    get_ideal_weighted_guess_scores, after the chosen guesses) are the same, returned as (start, end, ids of the
+    ideal guesses). Each guess is found from the frontier of the guesses without the letters of those before it.
+    '''
+    ids = np.flatnonzero(masks & excluded_mask == 0)
+    if len(ids) == 0:
+        return [(low, high, chosen)]
+    segments = []
+    for start, end, best in get_frontier_segments(greens, yellows, ids, low, high):
+        segments.extend(sweep_ideal_guesses(greens, yellows, masks, start, end,
+                excluded_mask | int(masks[best]), chosen + (best,)))
+    return merge_segments(segments)
+
+
+def sweep_top_guesses(greens, yellows, ids, k, low, high):
+    '''
+    Split the range of green multipliers from low to high into segments where the k guesses (among the given ids)
+    with the best weighted scores are the same, in the same order, returned as (start, end, ids of the top guesses).
+
+    Starting from the ranking at the low multiplier, the ranking only has to be updated at the next multiplier where
+    one top guess overtakes the one before it, or another guess overtakes the last top guess, until the high
+    multiplier is reached.
+    '''
+    def rank(multiplier):
+        return ids[np.lexsort((ids, -(greens[ids] * multiplier + yellows[ids])))]
+    def get_crossings(leading, trailing, after):
+        # the multipliers where the trailing guesses overtake the leading guesses, if they ever do after the given one
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crossings = (yellows[leading] - yellows[trailing]) / (greens[trailing] - greens[leading])
+        crossings = crossings[(greens[trailing] > greens[leading]) & (crossings > after)]
+        return crossings.min() if len(crossings) > 0 else math.inf
+    segments = []
+    start = multiplier = low
+    ranking = rank(low)
+    while True:
+        top = ranking[0:k]
+        crossing = min(get_crossings(top[:-1], top[1:], multiplier),
+                get_crossings(top[-1:], ranking[k:], multiplier)) if len(top) > 0 else math.inf
+        if crossing >= high:
+            segments.append((start, high, tuple(top.tolist())))
+            return merge_segments(segments)
+        # rank just after the crossing, so that the guesses overtaken there are behind the ones overtaking them
+        multiplier = crossing + SWEEP_EPSILON
+        ranking = rank(multiplier)
+        if not np.array_equal(ranking[0:k], top):
+            segments.append((start, crossing, tuple(top.tolist())))
+            start = crossing
+
+
+def get_sweep_rows(expected_guess_scores, multipliers, limit_guesses_to=None):
+    '''
+    Find the top guesses and the ideal guesses by weighted score for ranges of green multipliers, split at every
+    multiplier where either of them changes for a range of multipliers (given as a pair), or at each of a list of
+    multipliers. Returns rows of (start, end, top guesses, ideal guesses), with the words of the guesses.
+    The top guesses are limited as in print_guesses_with_best_expected_scores.
+    '''
+    index = build_guess_index(expected_guess_scores)
+    greens = np.array([guess.greens for guess in expected_guess_scores], dtype=np.float64)
+    yellows = np.array([guess.yellows for guess in expected_guess_scores], dtype=np.float64)
+    possible_guesses = index.num_letters >= WORD_LENGTH - MAX_DUPLICATE_GUESS_LETTERS
+    if limit_guesses_to:
+        limit_guesses_to = set(limit_guesses_to)
+        possible_guesses &= np.array([guess.word in limit_guesses_to for guess in expected_guess_scores], dtype=bool)
+    low, high = (multipliers if isinstance(multipliers, tuple) else (min(multipliers), max(multipliers)))
+    # the range is extended a little, so that each listed multiplier is inside a segment (wider than the narrowest
+    # segments that are merged away, so that a segment starting at the highest multiplier is kept)
+    top_segments = sweep_top_guesses(greens, yellows, np.flatnonzero(possible_guesses), PRINTING_NUM_WORDS,
+            low, high + 2 * SWEEP_EPSILON)
+    ideal_segments = sweep_ideal_guesses(greens, yellows, index.masks, low, high + 2 * SWEEP_EPSILON)
+    def find_segment(segments, multiplier):
+        return segments[bisect_right([start for start, _, _ in segments], multiplier) - 1][2]
+    if isinstance(multipliers, tuple):
+        starts = sorted(set(start for start, _, _ in top_segments + ideal_segments if start < high))
+        # the guesses of each range are those in its middle, as the two sweeps may split at almost the same
+        # multiplier, leaving ranges too narrow to show (which are merged into the ranges next to them)
+        rows = merge_segments([(start, end, (find_segment(top_segments, (start + end) / 2),
+                find_segment(ideal_segments, (start + end) / 2))) for start, end in zip(starts, starts[1:] + [high])])
+    else:
+        rows = [(multiplier, multiplier, (find_segment(top_segments, multiplier),
+                find_segment(ideal_segments, multiplier))) for multiplier in multipliers]
+    return [(start, end, [index.scores.words[i] for i in top], [index.scores.words[i] for i in ideal])
+            for start, end, (top, ideal) in rows]
+
+
+def sweep_green_multipliers(expected_guess_scores, multipliers, limit_guesses_to=None):
+    '''
+    Display (and save as CSV, if chosen) how the top guesses and the ideal guesses by weighted score change with the
+    green multiplier (see get_sweep_rows).
+    '''
+    import csv
+    rows = get_sweep_rows(expected_guess_scores, multipliers, limit_guesses_to)
+    print(coloured("\nTop scoring initial guesses and statistically ideal guesses by green multiplier:",
+            attrs=['bold']))
+    for start, end, top_guesses, ideal_guesses in rows:
+        label = f"x = {start:0.3f}" + (f" to {end:0.3f}" if end != start else '') + ":"
+        print(coloured(label, 'blue', attrs=['bold']) + ' ' * (25 - len(label)) + ', '.join(top_guesses))
+        print(' ' * 25 + coloured("ideal: '" + "' and '".join(ideal_guesses) + "'", 'cyan'))
+    if SWEEP_CSV_FILE:
+        with open(SWEEP_CSV_FILE, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file, lineterminator='\n')
+            writer.writerow(['from_multiplier', 'to_multiplier', 'top_guesses', 'ideal_guesses'])
+            for start, end, top_guesses, ideal_guesses in rows:
+                writer.writerow([start, end, ' '.join(top_guesses), ' '.join(ideal_guesses)])
+        print(f"Saved the sweep to '{SWEEP_CSV_FILE}'")
+
+
+def get_bitset(flags):
+    '''
+    Convert an array of boolean flags into a bitset (an integer with bit i set if the i-th flag is set).
+    '''
+    return int.from_bytes(np.packbits(flags, bitorder='little').tobytes(), 'little')
+
+
+def get_bitset_indices(bitset, size):
+    '''
+    Convert a bitset (as returned by get_bitset) back into an array of the indices of the bits that are set.
+    '''
+    data = np.frombuffer(bitset.to_bytes((size + 7) // 8, 'little'), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(data, count=size, bitorder='little'))
+
+
+def build_candidate_index(answers):
+    '''
+    Index the answer words by letter, so that the answers matching a clue can be found without scanning every word.
+
+    The index holds a bitset of the answers with each letter in each position, and a bitset of the answers
+    with at least k copies of each letter (for k from 0 to one more than the word length).
+    '''
+    answer_codes = encode_words(answers)
+    positions = [{letter: get_bitset(answer_codes[:, i] == code) for code, letter in enumerate(ALPHABET)}
+            for i in range(WORD_LENGTH)]
+    letter_counts = np.stack([(answer_codes == code).sum(axis=1) for code in range(len(ALPHABET))], axis=1)
+    counts = {letter: [get_bitset(letter_counts[:, code] >= k) for k in range(WORD_LENGTH + 2)]
+            for code, letter in enumerate(ALPHABET)}
+    return CandidateIndex(len(answers), (1 << len(answers)) - 1, positions, counts)
+
+
+def parse_feedback(feedback):
+    '''
+    Convert the feedback for a guess into the string format returned by get_specific_guess_score.
+
+    Greens may be given as 'G' or 'g', yellows as 'Y' or 'y', and misses as any of '.', '-', '_' or 'x'.
+    '''
+    marks = {'G': 'G', 'g': 'G', 'Y': 'y', 'y': 'y', '.': '.', '-': '.', '_': '.', 'x': '.'}
+    if len(feedback) != WORD_LENGTH or not all(mark in marks for mark in feedback):
+        raise ValueError(f"feedback '{feedback}' should be {WORD_LENGTH} characters, " +
+                "each G (green), y (yellow) or . (miss)")
+    return ''.join(marks[mark] for mark in feedback)
+
+
+def apply_feedback(index, candidates, guess_word, feedback):
+    '''
+    Narrow down a bitset of candidate answers to those that would give the feedback received for a guess.
+
+    The feedback has the same meaning as in get_specific_guess_score: every green position must match,
+    no other position may hold the guessed letter, and each letter must occur exactly as many times as it was
+    marked green or yellow if any copy of it was a miss (or at least that many times otherwise).
+    Raises ValueError if no answer could ever give the feedback for the guess.
+    '''
+    if len(guess_word) != WORD_LENGTH or not all(letter in index.positions[0] for letter in guess_word):
+        raise ValueError(f"guess '{guess_word}' should be {WORD_LENGTH} lowercase letters")
+    for i, (letter, mark) in enumerate(zip(guess_word, feedback)):
+        if mark == 'G':
+            candidates &= index.positions[i][letter]
+        else:
+            candidates &= ~index.positions[i][letter]
+    for letter in set(guess_word):
+        marks = [mark for guess_letter, mark in zip(guess_word, feedback) if guess_letter == letter]
+        not_greens = ''.join(mark for mark in marks if mark != 'G')
+        # yellows are assigned from left to right, so a yellow can never follow a miss for the same letter
+        if 'y' in not_greens.lstrip('y'):
+            raise ValueError(f"feedback '{feedback}' is not possible for guess '{guess_word}'")
+        num_hits = len(marks) - marks.count('.')
+        candidates &= index.counts[letter][num_hits]
+        if '.' in marks:
+            candidates &= ~index.counts[letter][num_hits + 1]
+    return candidates
+
+
+def get_candidate_guess_scores(hit_counts, patterns, candidates, guesses, columns, with_partition_scores=False):
+    '''
+    Calculate the expected scores of the legal guesses in the given columns relative to the remaining candidate
+    answers, as a table of scores (see load_score_table) with one row per column.
+
+    The hit counts hold the number of greens and yellows of every guess (one column each) for every answer
+    (one row each), and the patterns hold the matching feedback patterns. Only the rows of the candidates are used.
+    With partition scores, the feedback patterns of the guesses are also counted for the chosen metric.
+    '''
+    green_hits, yellow_hits = hit_counts
+    greens = green_hits[np.ix_(candidates, columns)].sum(axis=0, dtype=np.int64)
+    yellows = yellow_hits[np.ix_(candidates, columns)].sum(axis=0, dtype=np.int64)
+    partition_scores = [None, None, None]
+    if with_partition_scores:
+        partition_scores = get_pattern_partition_scores(patterns[np.ix_(candidates, columns)].T, WORD_LENGTH)
+    return ScoreTable([guesses[column] for column in columns.tolist()], None, greens / len(candidates),
+            yellows / len(candidates), (greens + yellows) / len(candidates), *partition_scores)
+
+
+def get_candidate_ranking_scores(hit_counts, patterns, candidates, columns):
+    '''
+    Calculate the scores used to rank the legal guesses in the given columns by the chosen metric (see
+    get_ranking_score) relative to the remaining candidate answers, as an array.
+
+    Only what the metric needs is calculated, so that every guess can be ranked quickly: the greens and yellows
+    are summed over the rows of the candidates before the columns are picked out (as a sum of up to 5 hits for
+    each answer fits in 32 bits), and for the partition metrics, the feedback patterns are counted a block of
+    columns at a time and only the chosen metric is calculated from the counts.
+    '''
+    if METRIC == 'weighted':
+        green_hits, yellow_hits = hit_counts
+        greens = green_hits[candidates].sum(axis=0, dtype=np.uint32)[columns]
+        yellows = yellow_hits[candidates].sum(axis=0, dtype=np.uint32)[columns]
+        return greens / len(candidates) * GREEN_MULTIPLIER + yellows / len(candidates)
+    counts = count_feedback_groups(patterns[candidates].T, WORD_LENGTH, rows=columns).reshape(len(columns), -1)
+    if METRIC == 'max-bucket':
+        return -counts.max(axis=1)
+    if METRIC == 'expected-remaining':
+        return -(counts * counts).sum(axis=1) / len(candidates)
+    sizes = np.arange(len(candidates) + 1)
+    size_entropy = sizes * np.log2(np.maximum(sizes, 1))
+    # the groups are added up in order, as in get_group_partition_scores, so that the entropy is exactly the same
+    return math.log2(len(candidates)) - size_entropy[counts].cumsum(axis=1)[:, -1] / len(candidates)
+
+
+def prepare_solver(guesses, answers):
+    '''
+    Load (or calculate) everything needed to narrow down the answers from clues, and to rank the next guesses.
+
+    This includes the cached feedback patterns of every guess for every answer, and the number of greens
+    and yellows in each of them.
+    '''
+    patterns = get_all_feedback_patterns(guesses, answers)
+    green_counts, yellow_counts = get_pattern_hit_counts(WORD_LENGTH)
+    hit_counts = (green_counts.astype(np.uint8)[patterns], yellow_counts.astype(np.uint8)[patterns])
+    return Solver(build_candidate_index(answers), patterns, hit_counts)
+
+
+def get_allowed_guesses(guesses, limit_guesses_to=None):
+    '''
+    Determine which guesses may be suggested: those without too many duplicated letters,
+    and within the limited set (if specified).
+    '''
+    return [len(set(guess_word)) >= WORD_LENGTH - MAX_DUPLICATE_GUESS_LETTERS and
+            (limit_guesses_to is None or guess_word in limit_guesses_to) for guess_word in guesses]
+
+
+def apply_clues(index, clues):
+    '''
+    Find the bitset of the candidate answers that would give the feedback received for each of a sequence of guesses
+    (see apply_feedback), given as pairs of a guess and its feedback.
+    '''
+    candidates = index.all
+    for guess_word, feedback in clues:
+        candidates = apply_feedback(index, candidates, guess_word, feedback)
+    return candidates
+
+
+def get_best_next_guesses(expected_guess_scores, answers, solver, candidates, allowed, num_results):
+    '''
+    Find the best num_results of the allowed guesses by the chosen metric against the remaining candidate answers
+    (an array of indices), best first, preferring guesses that could be the answer.
+
+    While every answer remains, the expected scores of the guesses (for all the answers) are used as they are.
+    Only the guesses ranked in the top num_results (or tied with the last of them) are sorted, with ties broken
+    by the order of the guesses, in the same way as a stable sort of every guess would, and only their expected
+    scores are calculated.
+    '''
+    columns = np.flatnonzero(allowed)
+    num_results = min(num_results, len(columns))
+    if num_results <= 0:
+        return []
+    if len(candidates) == len(answers):
+        ranking = np.array([get_ranking_score(expected_guess_scores[column]) for column in columns.tolist()])
+    else:
+        ranking = get_candidate_ranking_scores(solver.hit_counts, solver.patterns, candidates, columns)
+    cutoff = np.partition(ranking, len(ranking) - num_results)[len(ranking) - num_results]
+    shortlist = np.flatnonzero(ranking >= cutoff)
+    candidate_words = set(answers[answer] for answer in candidates.tolist())
+    could_be_answer = np.array([expected_guess_scores[column].word in candidate_words
+            for column in columns[shortlist].tolist()], dtype=bool)
+    # lexsort is stable, and sorts by its last key first
+    best_columns = columns[shortlist[np.lexsort((~could_be_answer, -ranking[shortlist]))][:num_results]]
+    if len(candidates) == len(answers):
+        return [expected_guess_scores[column] for column in best_columns.tolist()]
+    return get_expected_scores(get_candidate_guess_scores(solver.hit_counts, solver.patterns, candidates,
+            [guess.word for guess in expected_guess_scores], best_columns, with_partition_scores=METRIC != 'weighted'))
+
+
+def solve(expected_guess_scores, answers, clues, limit_guesses_to=None, decision_tree=None):
+    '''
+    Narrow down the possible answers from the feedback received for each guess, and suggest the next guesses.
+
+    Each clue is a guess and the feedback it received, separated by a colon. If no clues are given, they are read
+    interactively (one guess and its feedback per line), with 'undo' to forget the last clue, 'reset' to start
+    again, and a blank line or 'quit' to stop. After each clue, the remaining candidate answers are shown together
+    with the best next guesses against them, ranked by the chosen metric (preferring guesses that could be the answer).
+    If a decision tree (as saved by get_decision_tree) is given, the guess it makes next is shown as well.
+    '''
+    guesses = [guess.word for guess in expected_guess_scores]
+    solver = prepare_solver(guesses, answers)
+    index = solver.index
+    allowed = get_allowed_guesses(guesses, limit_guesses_to)
+    legal_guess_set = set(guesses)
+    # the clues given so far, and the bitset of candidate answers remaining before and after each of them
+    history = []
+    states = [index.all]
+
+    def show(elapsed):
+        candidates = get_bitset_indices(states[-1], index.size)
+        print(coloured("\nAfter " + (' '.join(f"{g}:{f}" for g, f in history) or 'no guesses'), attrs=['bold']))
+        print(f"{len(candidates)} possible answers remain ({1000 * elapsed:0.1f} ms)")
+        if len(candidates) == 0:
+            print(coloured("No answers match the feedback given", 'red', attrs=['bold']))
+            return
+        if len(candidates) == 1:
+            print(coloured(f"The answer is '{answers[candidates[0]]}'", 'green', attrs=['bold']))
+            return
+        print(coloured(', '.join(answers[answer] for answer in candidates[0:PRINTING_NUM_WORDS]), 'cyan') +
+                (' ...' if len(candidates) > PRINTING_NUM_WORDS else ''))
+        start = time.perf_counter()
+        top_guesses = get_best_next_guesses(expected_guess_scores, answers, solver, candidates, allowed,
+                PRINTING_NUM_WORDS)
+        elapsed = time.perf_counter() - start
+        best_label = f"Best {METRICS[METRIC][0]}:"
+        print(coloured(best_label, attrs=['underline']) + ' ' * (25 - len(best_label)) + ', '.join(
+                f"{guess.word} ({METRICS[METRIC][1].format(get_metric_value(guess))})"
+                for guess in top_guesses[0:PRINTING_NUM_WORDS]) + f" ({1000 * elapsed:0.1f} ms)")
+        if decision_tree:
+            tree = lookup_decision_tree(decision_tree, history)
+            print("Decision tree guess:     " + (coloured(tree['guess'], 'blue', attrs=['bold']) if tree
+                    else coloured("none (the guesses so far are not in the decision tree)", 'red')))
+
+    def add_clue(guess_word, feedback):
+        start = time.perf_counter()
+        guess_word = guess_word.lower()
+        feedback = parse_feedback(feedback)
+        states.append(apply_feedback(index, states[-1], guess_word, feedback))
+        history.append((guess_word, feedback))
+        elapsed = time.perf_counter() - start
+        if guess_word not in legal_guess_set:
+            print(coloured(f"WARNING: guess '{guess_word}' is not in the set of legal guesses", 'red', attrs=['bold']))
+        show(elapsed)
+
+    print(coloured(f"\nSolving (from {len(answers)} possible answers)", attrs=['bold']))
+    show(0)
+    if clues:
+        for clue in clues:
+            guess_word, _, feedback = clue.partition(':')
+            try:
+                add_clue(guess_word, feedback)
+            except ValueError as e:
+                print(coloured(f"ERROR: {e}", 'red'))
+                return
+        return
+    print("\nEnter each guess and its feedback (G = green, y = yellow, . = miss), e.g. 'crane ..yG.'")
+    while True:
+        try:
+            line = input('> ').strip()
+        except EOFError:
+            break
+        if line in ('', 'quit', 'exit'):
+            break
+        if line in ('undo', 'reset'):
+            del history[len(history) - 1 if line == 'undo' else 0:]
+            del states[len(history) + 1:]
+            show(0)
+            continue
+        clue = line.replace(':', ' ').split()
+        if len(clue) != 2:
+            print(coloured("ERROR: enter a guess and its feedback, separated by a space", 'red'))
+            continue
+        try:
+            add_clue(*clue)
+        except ValueError as e:
+            print(coloured(f"ERROR: {e}", 'red'))
+
+
+def get_decision_tree_guess_order(search, candidates):
+    '''
+    Find the guesses that look most promising for splitting up the candidate answers, best first.
+
+    Guesses are ordered by the expected number of answers remaining after them (not counting the answer that
+    is found if the guess is itself a candidate), and only as many as the width of the search are returned.
+    '''
+    candidate_patterns = search.patterns[candidates][:, search.guess_indices]
+    num_candidates = len(candidates)
+    if num_candidates <= DECISION_TREE_PAIR_LIMIT:
+        # with few candidates, it is quicker to count the pairs of candidates that share the same feedback
+        num_pairs = np.zeros(len(search.guess_indices), dtype=np.int64)
+        for i in range(num_candidates - 1):
+            num_pairs += (candidate_patterns[i + 1:] == candidate_patterns[i]).sum(axis=0)
+        sum_of_squares = num_candidates + 2 * num_pairs
+    else:
+        _, expected_remaining, _ = get_pattern_partition_scores(candidate_patterns.T, WORD_LENGTH)
+        sum_of_squares = np.rint(expected_remaining * num_candidates).astype(np.int64)
+    positions = search.answer_positions[candidates]
+    sum_of_squares[positions[positions >= 0]] -= 1
+    return search.guess_indices[np.argsort(sum_of_squares, kind='stable')[0:search.width]]
+
+
+def find_decision_tree(search, candidates, budget=math.inf):
+    '''
+    Find the strategy that solves every one of the candidate answers (a sorted array of answer indices)
+    with the fewest total guesses.
+
+    Returns the total number of guesses needed over all the candidates (counting this guess), and the strategy
+    as a pair of the guess to make and a dictionary from each feedback pattern (other than all greens) to the
+    strategy to follow after it. Only the most promising guesses (see get_decision_tree_guess_order) are
+    considered at each step, and a guess is abandoned as soon as a lower bound on its total shows that it can not
+    beat the best guess so far (every candidate needs one guess, and all but one of the candidates in each group
+    left after it need another). If the total can not be less than the budget, the budget is returned with no
+    strategy instead. Results are memoized on the bitset of candidate answers.
+    '''
+    patterns = search.patterns
+    num_candidates = len(candidates)
+    if num_candidates == 1:
+        return 1, (int(search.answer_guesses[candidates[0]]), {})
+    if num_candidates == 2:
+        first, second = search.answer_guesses[candidates].tolist()
+        return 3, (first, {int(patterns[candidates[1], first]): (second, {})})
+    flags = np.zeros(patterns.shape[0], dtype=bool)
+    flags[candidates] = True
+    key = get_bitset(flags)
+    if key in search.memo:
+        cost, tree = search.memo[key]
+        if tree is not None or cost >= budget:
+            return cost, tree
+    solved = 3 ** WORD_LENGTH - 1
+    best_cost, best_tree = budget, None
+    for guess in get_decision_tree_guess_order(search, candidates).tolist():
+        feedback = patterns[candidates, guess]
+        order = np.argsort(feedback, kind='stable')
+        starts = np.flatnonzero(np.diff(feedback[order])) + 1
+        groups = [(code, group) for code, group in zip(feedback[order][np.concatenate(([0], starts))].tolist(),
+                np.split(candidates[order], starts)) if code != solved]
+        if len(groups) == 1 and len(groups[0][1]) == num_candidates:
+            continue
+        # visit the largest groups first, as they are the most likely to show that the guess is no better
+        groups.sort(key=lambda group: len(group[1]), reverse=True)
+        remaining_bound = sum(2 * len(group) - 1 for _, group in groups)
+        cost = num_candidates
+        subtrees = {}
+        for code, group in groups:
+            if cost + remaining_bound >= best_cost:
+                subtrees = None
+                break
+            remaining_bound -= 2 * len(group) - 1
+            group_cost, subtree = find_decision_tree(search, group, budget=best_cost - cost - remaining_bound)
+            cost += group_cost
+            subtrees[code] = subtree
+        if subtrees is not None and cost < best_cost:
+            best_cost, best_tree = cost, (guess, subtrees)
+            if best_cost == 2 * num_candidates - 1:
+                break
+    search.memo[key] = (best_cost, best_tree)
+    return best_cost, best_tree
+
+
+def make_decision_tree_search(patterns, guesses, answers, limit_guesses_to=None):
+    '''
+    Prepare to search for decision trees, with a new memo.
+
+    The patterns are the cached feedback patterns (see get_all_feedback_patterns) of the guesses for the answers.
+    Every answer can always be guessed, even if the guesses are limited to a subset.
+    '''
+    columns = {guess_word: column for column, guess_word in reversed(list(enumerate(guesses)))}
+    answer_guesses = np.array([columns[answer] for answer in answers], dtype=np.int64)
+    if limit_guesses_to is None:
+        guess_indices = np.arange(len(guesses))
+    else:
+        guess_indices = np.array(sorted(set(answer_guesses.tolist()) |
+                set(columns[guess_word] for guess_word in limit_guesses_to if guess_word in columns)))
+    positions = {column: position for position, column in enumerate(guess_indices.tolist())}
+    answer_positions = np.array([positions.get(column, -1) for column in answer_guesses.tolist()], dtype=np.int64)
+    return DecisionTreeSearch(patterns, guess_indices, answer_guesses, answer_positions, DECISION_TREE_WIDTH, {})
+
+
+# the decision tree search used by every subtree found in a worker process (set once, when the worker starts)
+WORKER_DECISION_TREE_SEARCH = None
+
+
+def init_decision_tree_worker(patterns_filename, guesses, answers, limit_guesses_to, width):
+    '''
+    Prepare a worker process to find the subtrees of a decision tree, reading the cached feedback patterns itself.
+    '''
+    global DECISION_TREE_WIDTH, WORKER_DECISION_TREE_SEARCH
+    DECISION_TREE_WIDTH = width
+    patterns = read_score_cache(patterns_filename)[1]['patterns']
+    WORKER_DECISION_TREE_SEARCH = make_decision_tree_search(patterns, guesses, answers, limit_guesses_to)
+
+
+def find_decision_subtree(code, candidates):
+    '''
+    Find the decision tree for one group of candidate answers, in a worker process.
+    '''
+    return code, find_decision_tree(WORKER_DECISION_TREE_SEARCH, candidates)
+
+
+def build_decision_tree(patterns, guesses, answers, opener, limit_guesses_to=None):
+    '''
+    Build a complete strategy for solving every answer, starting with the given opening guess.
+
+    The answers are split into groups by the feedback they give for the opening guess, and the best strategy
+    for each group is found by find_decision_tree (sharing one memo). With more than one job, the groups are
+    instead solved in a pool of worker processes, largest first, and each worker keeps its own memo.
+    Returns the total number of guesses needed over all the answers, and the strategy (as returned by
+    find_decision_tree), or None for both if no strategy within the search width solves every group.
+    The patterns are the cached feedback patterns (see get_all_feedback_patterns) of the guesses for the answers.
+    '''
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    opener_column = guesses.index(opener)
+    feedback = np.asarray(patterns[:, opener_column])
+    groups = [(code, np.flatnonzero(feedback == code)) for code in np.unique(feedback).tolist()
+            if code != 3 ** WORD_LENGTH - 1]
+    groups.sort(key=lambda group: len(group[1]), reverse=True)
+    subtrees = {}
+    total = len(answers)
+    num_done = 0
+    num_total = sum(len(group) for _, group in groups)
+    def progress(group):
+        # report progress by the number of answers solved, in steps of 10%
+        nonlocal num_done
+        previous_percentage = 100 * num_done // num_total // 10 * 10
+        num_done += len(group)
+        if 100 * num_done // num_total // 10 * 10 > previous_percentage:
+            sys.stdout.write(f"{100 * num_done // num_total // 10 * 10}% ")
+            sys.stdout.flush()
+    if JOBS > 1 and len(groups) > 1:
+        filename = get_cache_filename('feedback_patterns', get_cache_key('feedback_patterns', guesses, answers))
+        with ProcessPoolExecutor(max_workers=JOBS, initializer=init_decision_tree_worker,
+                initargs=(filename, guesses, answers, limit_guesses_to, DECISION_TREE_WIDTH)) as pool:
+            futures = {pool.submit(find_decision_subtree, code, group): group for code, group in groups}
+            for future in as_completed(futures):
+                code, (cost, subtree) = future.result()
+                subtrees[code] = subtree
+                total += cost
+                progress(futures[future])
+    else:
+        search = make_decision_tree_search(patterns, guesses, answers, limit_guesses_to)
+        for code, group in groups:
+            cost, subtrees[code] = find_decision_tree(search, group)
+            total += cost
+            progress(group)
+    print('')
+    if any(subtree is None for subtree in subtrees.values()):
+        return None, None
+    return total, (opener_column, {code: subtrees[code] for code, _ in groups})
+
+
+def convert_decision_tree(tree, guesses, patterns, candidates, depth=1):
+    '''
+    Convert a decision tree (as returned by find_decision_tree) for the candidate answers into a form that can be
+    saved as JSON, with the guess and number of candidates at each step, and the tree to follow for each feedback
+    string (other than all greens).
+
+    Returns the converted tree and the largest number of guesses it ever needs.
+    '''
+    guess, subtrees = tree
+    converted = {'guess': guesses[guess], 'candidates': len(candidates)}
+    worst_case = depth
+    if subtrees:
+        feedback = np.asarray(patterns[candidates, guess])
+        converted['next'] = {}
+        for code, subtree in subtrees.items():
+            converted['next'][decode_feedback(code)], subtree_worst_case = convert_decision_tree(
+                    subtree, guesses, patterns, candidates[feedback == code], depth + 1)
+            worst_case = max(worst_case, subtree_worst_case)
+    return converted, worst_case
+
+
+def get_decision_tree(guesses, answers, opener, limit_guesses_to=None):
+    '''
+    Get the decision tree (see build_decision_tree) for an opening guess.
+
+    Once built, the tree is saved as JSON in the cache directory, along with the expected and largest number of
+    guesses it needs. It is loaded from there instead of rebuilt on subsequent runs with the same wordlists,
+    opening guess and search width (and the same limit on guesses). Returns the saved data, or None if no tree
+    was found within the search width.
+    '''
+    table = f"decision_tree_{opener}_{DECISION_TREE_WIDTH}" + ('_answers' if limit_guesses_to is not None else '')
+    key = get_cache_key(table, guesses, answers)
+    filename = os.path.splitext(get_cache_filename(table, key))[0] + '.json'
+    if os.path.exists(filename):
+        with open(filename, 'r') as f:
+            saved = json.load(f)
+        if saved['metadata'].get('key') == key:
+            print(f"Loading decision tree from '{filename}'")
+            count_work('cache_hits')
+            return saved
+    print(f"Building decision tree for '{opener}' (saving to '{filename}')")
+    count_work('cache_misses')
+    patterns = get_all_feedback_patterns(guesses, answers)
+    total, tree = build_decision_tree(patterns, guesses, answers, opener, limit_guesses_to)
+    if tree is None:
+        print(coloured(f"No decision tree for '{opener}' solves every answer within the search width " +
+                f"({DECISION_TREE_WIDTH} guesses at each step)", 'red'))
+        return None
+    tree, worst_case = convert_decision_tree(tree, guesses, patterns, np.arange(len(answers)))
+    metadata = {'table': table, 'key': key, 'scoring_version': SCORING_VERSION, 'word_length': WORD_LENGTH,
+            'opener': opener, 'width': DECISION_TREE_WIDTH, 'num_answers': len(answers), 'total_guesses': total,
+            'expected_guesses': total / len(answers), 'worst_case': worst_case}
+    saved = {'metadata': metadata, 'tree': tree}
+    os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+    with open(filename + '~', 'w') as out:
+        json.dump(saved, out, separators=(',', ':'))
+    os.replace(filename + '~', filename)
+    return saved
+
+
+def lookup_decision_tree(tree, clues):
+    '''
+    Follow a decision tree (as saved by get_decision_tree) through a sequence of guesses and their feedback.
+
+    Returns the part of the tree to follow next, or None if the guesses left the tree.
+    '''
+    for guess_word, feedback in clues:
+        if tree is None or tree['guess'] != guess_word:
+            return None
+        tree = tree.get('next', {}).get(feedback)
+    return tree
+
+
+def print_decision_tree(saved):
+    '''
+    Display the expected and largest number of guesses needed by a decision tree, and the second guess it makes
+    after each feedback for the opening guess.
+    '''
+    metadata = saved['metadata']
+    tree = saved['tree']
+    print(coloured(f"\nDecision tree for '{tree['guess']}' (considering {metadata['width']} guesses at each step)",
+            attrs=['bold']))
+    print(f"Expected guesses: " + coloured(f"{metadata['expected_guesses']:0.4f}", 'blue', attrs=['bold']) +
+            f" ({metadata['total_guesses']} for {metadata['num_answers']} answers), worst case: " +
+            coloured(f"{metadata['worst_case']}", 'red', attrs=['bold']))
+    branches = sorted(tree.get('next', {}).items(), key=lambda branch: branch[1]['candidates'], reverse=True)
+    for feedback, subtree in branches:
+        print(f"{tree['guess']} {feedback} ({subtree['candidates']:>4} answers) -> {subtree['guess']}")
+
+
+def choose_best_guess(simulation, candidates, only_candidates=False):
+    '''
+    Choose the guess ranked best by the chosen metric against the remaining candidate answers (an array of answer
+    indices), preferring guesses that could be the answer, in the same way as get_best_next_guesses.
+
+    With only candidates, the guess is chosen from the remaining candidate answers instead of the allowed guesses.
+    With one or two candidates left, or if the best guess could not tell the candidates apart, the first candidate
+    is guessed instead.
+    '''
+    answer_guesses = simulation.answer_guesses
+    if len(candidates) <= 2:
+        return int(answer_guesses[candidates[0]])
+    candidate_patterns = simulation.patterns[candidates]
+    if METRIC == 'weighted':
+        green_counts, yellow_counts = simulation.pattern_hits
+        ranking = green_counts[candidate_patterns].sum(axis=0, dtype=np.int64) / len(candidates) * GREEN_MULTIPLIER + \
+                yellow_counts[candidate_patterns].sum(axis=0, dtype=np.int64) / len(candidates)
+    else:
+        entropy, expected_remaining, max_bucket = get_pattern_partition_scores(candidate_patterns.T, WORD_LENGTH)
+        ranking = {'entropy': entropy, 'expected-remaining': -expected_remaining, 'max-bucket': -max_bucket}[METRIC]
+    ranking = ranking.astype(np.float64)
+    flags = np.zeros(len(ranking), dtype=bool)
+    flags[answer_guesses[candidates]] = True
+    ranking[~(flags if only_candidates else simulation.allowed)] = -np.inf
+    best = np.flatnonzero(ranking == ranking.max())
+    preferred = best[flags[best]]
+    guess = int(preferred[0] if len(preferred) else best[0])
+    # a guess that could not be the answer and gives the same feedback for every candidate would be wasted
+    if not flags[guess] and (candidate_patterns[:, guess] == candidate_patterns[0, guess]).all():
+        return int(answer_guesses[candidates[0]])
+    return guess
+
+
+def choose_best_candidate(simulation, candidates):
+    '''
+    Choose the remaining candidate answer ranked best by the chosen metric (see choose_best_guess).
+    '''
+    return choose_best_guess(simulation, candidates, only_candidates=True)
+
+
+SIMULATION_STRATEGIES = {
+    'best': choose_best_guess,
+    'candidates': choose_best_candidate,
+}
+
+
+def make_simulation(patterns, guesses, answers, openers, strategy, limit_guesses_to=None):
+    '''
+    Prepare to play games with a strategy (one of SIMULATION_STRATEGIES), after the opening guesses, with a new memo.
+
+    The patterns are the cached feedback patterns (see get_all_feedback_patterns) of the guesses for the answers.
+    The strategies choose from the same guesses as get_best_next_guesses (see get_allowed_guesses).
+    '''
+    columns = {guess_word: column for column, guess_word in reversed(list(enumerate(guesses)))}
+    answer_guesses = np.array([columns[answer] for answer in answers], dtype=np.int64)
+    return Simulation(patterns, get_pattern_hit_counts(WORD_LENGTH),
+            np.array(get_allowed_guesses(guesses, limit_guesses_to), dtype=bool), answer_guesses,
+            [columns[opener] for opener in openers], SIMULATION_STRATEGIES[strategy], {})
+
+
+def play_game(simulation, answer):
+    '''
+    Play the game for an answer (an answer index), narrowing down the candidate answers by the feedback for each guess.
+
+    The opening guesses are played first, for as long as more than one candidate remains, and the strategy chooses
+    the rest. As the strategy only depends on the feedback received so far, its choices are memoized on the feedback,
+    and shared by every game that receives the same feedback. Returns the guesses made (as guess indices), and the
+    time the strategy took to choose each guess it was asked for (guesses from the memo and opening guesses are
+    not timed).
+    '''
+    patterns = simulation.patterns
+    solved = 3 ** WORD_LENGTH - 1
+    candidates = np.arange(patterns.shape[0])
+    history = ()
+    guesses = []
+    latencies = []
+    while True:
+        guess = simulation.memo.get(history)
+        if guess is None:
+            if len(guesses) < len(simulation.openers) and len(candidates) > 1:
+                guess = simulation.openers[len(guesses)]
+            else:
+                start = time.perf_counter()
+                guess = simulation.strategy(simulation, candidates)
+                latencies.append(time.perf_counter() - start)
+            simulation.memo[history] = guess
+        guesses.append(guess)
+        feedback = int(patterns[answer, guess])
+        if feedback == solved:
+            return guesses, latencies
+        candidates = candidates[patterns[candidates, guess] == feedback]
+        history += (feedback,)
+
+
+# the simulation used by every game played in a worker process (set once, when the worker starts)
+WORKER_SIMULATION = None
+
+
+def init_simulation_worker(patterns_filename, guesses, answers, openers, strategy, limit_guesses_to, metric,
+        green_multiplier):
+    '''
+    Prepare a worker process to play games, reading the cached feedback patterns itself (memory-mapped, so that
+    they are shared with every other worker).
+    '''
+    global GREEN_MULTIPLIER, METRIC, WORKER_SIMULATION
+    GREEN_MULTIPLIER = green_multiplier
+    METRIC = metric
+    patterns = read_score_cache(patterns_filename)[1]['patterns']
+    WORKER_SIMULATION = make_simulation(patterns, guesses, answers, openers, strategy, limit_guesses_to)
+
+
+def play_games(answer_indices):
+    '''
+    Play the games for a chunk of answers in a worker process (see play_game).
+    '''
+    return [(answer, *play_game(WORKER_SIMULATION, answer)) for answer in answer_indices]
+
+
+def simulate_games(expected_guess_scores, guesses, answers, strategy, openers=None, limit_guesses_to=None):
+    '''
+    Play a game for every answer (or a sample of them) with a strategy (one of SIMULATION_STRATEGIES), and display
+    how many guesses the games needed, how many of them failed (needing more than MAX_GUESSES guesses), and how long
+    it took the strategy to choose each guess that was not already in the memo.
+
+    Without opening guesses, the games open with the best guess by the chosen metric (as -T does), chosen from the
+    answers with the 'candidates' strategy. With more than one job, the games are played in a pool of worker
+    processes, in chunks, with a memo in each worker. The guesses made in every game are saved as CSV if requested.
+    '''
+    import csv
+    from concurrent.futures import ProcessPoolExecutor
+    import random
+    openers = [opener.partition(':')[0].lower() for opener in openers or []]
+    for opener in openers:
+        if opener not in guesses:
+            print(coloured(f"ERROR: opening guess '{opener}' is not in the set of legal guesses", 'red'))
+            return
+    if not openers:
+        opener_limit = set(answers) if strategy == 'candidates' else limit_guesses_to
+        openers = [max((guess for guess in expected_guess_scores
+                if opener_limit is None or guess.word in opener_limit), key=get_ranking_score).word]
+    patterns = get_all_feedback_patterns(guesses, answers)
+    answer_indices = list(range(len(answers)))
+    if SIMULATION_SAMPLE is not None and SIMULATION_SAMPLE < len(answers):
+        answer_indices = sorted(random.Random(SIMULATION_SEED).sample(answer_indices, SIMULATION_SAMPLE))
+    print(coloured(f"\nSimulating {len(answer_indices)} games (strategy '{strategy}', metric '{METRIC}', " +
+            f"opening with {' '.join(openers)})", attrs=['bold']))
+    start = time.perf_counter()
+    if JOBS > 1:
+        filename = get_cache_filename('feedback_patterns', get_cache_key('feedback_patterns', guesses, answers))
+        chunk_size = max(1, -(-len(answer_indices) // (JOBS * SIMULATION_CHUNKS_PER_JOB)))
+        chunks = [answer_indices[i:i + chunk_size] for i in range(0, len(answer_indices), chunk_size)]
+        with ProcessPoolExecutor(max_workers=JOBS, initializer=init_simulation_worker,
+                initargs=(filename, guesses, answers, openers, strategy, limit_guesses_to, METRIC,
+                    GREEN_MULTIPLIER)) as pool:
+            games = [game for chunk_games in pool.map(play_games, chunks) for game in chunk_games]
+    else:
+        simulation = make_simulation(patterns, guesses, answers, openers, strategy, limit_guesses_to)
+        games = [(answer, *play_game(simulation, answer)) for answer in answer_indices]
+    elapsed = time.perf_counter() - start
+    count_work('games_played', len(games))
+    if not games:
+        print(coloured('No games were played', 'red'))
+        return
+
+    num_guesses = Counter(len(game_guesses) for _, game_guesses, _ in games)
+    latencies = np.array([latency for _, _, game_latencies in games for latency in game_latencies])
+    num_failed = sum(count for length, count in num_guesses.items() if length > MAX_GUESSES)
+    print(f"Played {len(games)} games in {elapsed:0.2f} s ({1000 * elapsed / max(1, len(games)):0.2f} ms per game)")
+    for length in range(1, max(num_guesses) + 1):
+        count = num_guesses[length]
+        print(f"{length:>3} guesses: {count:>5} ({count / len(games):>6.1%}) " +
+                coloured('#' * math.ceil(40 * count / max(num_guesses.values())),
+                    'red' if length > MAX_GUESSES else 'green'))
+    expected_guesses = sum(length * count for length, count in num_guesses.items()) / len(games)
+    print(f"Expected guesses: " + coloured(f"{expected_guesses:0.4f}", 'blue', attrs=['bold']) + f", worst case: " +
+            coloured(f"{max(num_guesses)}", 'red', attrs=['bold']) +
+            f", failed (more than {MAX_GUESSES} guesses): {num_failed} ({num_failed / len(games):0.2%})")
+    num_moves = sum(num_guesses[length] * length for length in num_guesses)
+    if len(latencies):
+        print(f"Time per chosen move: {1000 * latencies.mean():0.3f} ms mean, " +
+                f"{1000 * np.median(latencies):0.3f} ms median, {1000 * np.percentile(latencies, 95):0.3f} ms " +
+                f"95th percentile, {1000 * latencies.max():0.3f} ms max ({len(latencies)} moves chosen by the " +
+                f"strategy, {num_moves - len(latencies)} opening or from the memo)")
+    else:
+        print(f"No moves were chosen by the strategy ({num_moves} opening or from the memo)")
+    if GAMES_CSV_FILE:
+        with open(GAMES_CSV_FILE, 'w', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(['answer', 'num_guesses', 'guesses'])
+            for answer, game_guesses, _ in games:
+                writer.writerow([answers[answer], len(game_guesses),
+                        ' '.join(guesses[guess] for guess in game_guesses)])
+        print(f"Saved the guesses made in every game to '{GAMES_CSV_FILE}'")
+
+
+# the tables written by export_sqlite: their columns, the primary key of those stored without row ids, and the
+# columns they are indexed on
+EXPORT_TABLES = {
+    'guesses': (['id INTEGER PRIMARY KEY', 'word TEXT NOT NULL UNIQUE', 'is_answer INTEGER NOT NULL',
+            'letters_mask INTEGER NOT NULL', 'num_letters INTEGER NOT NULL', 'greens REAL NOT NULL',
+            'yellows REAL NOT NULL', 'total REAL NOT NULL', 'weighted_score REAL NOT NULL', 'entropy REAL',
+            'expected_remaining REAL', 'max_bucket INTEGER'], None,
+        ['letters_mask', 'greens', 'yellows', 'total', 'weighted_score', 'entropy', 'expected_remaining']),
+    'letter_frequencies': (['position INTEGER NOT NULL', 'letter TEXT NOT NULL', 'log_frequency REAL NOT NULL'],
+        'position, letter', []),
+    'patterns': (['pattern INTEGER PRIMARY KEY', 'feedback TEXT NOT NULL UNIQUE', 'greens INTEGER NOT NULL',
+            'yellows INTEGER NOT NULL'], None, []),
+    'partitions': (['guess_id INTEGER NOT NULL', 'pattern INTEGER NOT NULL', 'num_answers INTEGER NOT NULL',
+            'answers TEXT NOT NULL'], 'guess_id, pattern', ['num_answers']),
+}
+
+
+def write_export_table(db, name, source_key, rows):
+    '''
+    Rewrite a table of an export (one of EXPORT_TABLES) from an iterable of rows, unless it was last written from
+    the same source data (identified by the source key).
+
+    The table is dropped, recreated and filled in a single transaction, and only indexed once it is full (which is
+    quicker than keeping the indexes up to date while inserting). Returns whether the table was rewritten.
+    '''
+    exported = db.execute('SELECT source_key FROM export_tables WHERE name = ?', (name,)).fetchone()
+    if exported is not None and exported[0] == source_key:
+        print(f"Keeping table '{name}' (unchanged)")
+        return False
+    start = time.perf_counter()
+    columns, primary_key, indexed_columns = EXPORT_TABLES[name]
+    insert = f"INSERT INTO {name} VALUES ({', '.join('?' * len(columns))})"
+    num_rows = 0
+    with db:
+        db.execute(f"DROP TABLE IF EXISTS {name}")
+        db.execute(f"CREATE TABLE {name} ({', '.join(columns)}" +
+                (f", PRIMARY KEY ({primary_key})) WITHOUT ROWID" if primary_key else ')'))
+        rows = iter(rows)
+        for block in iter(lambda: list(islice(rows, EXPORT_BLOCK_SIZE * 256)), []):
+            db.executemany(insert, block)
+            num_rows += len(block)
+        for column in indexed_columns:
+            db.execute(f"CREATE INDEX {name}_{column} ON {name} ({column})")
+        db.execute('INSERT OR REPLACE INTO export_tables VALUES (?, ?, ?, ?)',
+                (name, source_key, num_rows, time.strftime('%Y-%m-%d %H:%M:%S')))
+    count_work('rows_exported', num_rows)
+    print(f"Wrote {num_rows} rows to table '{name}' ({time.perf_counter() - start:0.2f} s)")
+    return True
+
+
+def iter_partition_rows(patterns, columns, answers):
+    '''
+    Generate the rows of the partitions table of an export: the number of answers giving each feedback pattern for
+    each guess, and which answers they are (as a JSON array of words, in the order of the answers).
+
+    The patterns are the cached feedback patterns (see get_all_feedback_patterns), of which only the given columns
+    (guesses) are exported. The guesses are read a block at a time, and the rows are generated in the order of the
+    primary key of the table.
+    '''
+    num_answers = len(answers)
+    answers = np.array(answers)
+    for start in range(0, len(columns), EXPORT_BLOCK_SIZE):
+        block = columns[start:start + EXPORT_BLOCK_SIZE]
+        keys = np.sort(np.asarray(patterns[:, block]).T.astype(np.int64) * num_answers + np.arange(num_answers),
+                axis=1).ravel()
+        group_patterns = keys // num_answers
+        # a group starts wherever the pattern changes, or at the first pattern of each guess (which may be the same
+        # as the last pattern of the guess before it)
+        group_rows = np.arange(len(keys)) // num_answers
+        group_starts = np.flatnonzero((np.diff(group_rows, prepend=-1) != 0) |
+                (np.diff(group_patterns, prepend=-1) != 0))
+        group_ends = np.append(group_starts[1:], len(keys))
+        group_answers = answers[keys % num_answers].tolist()
+        for guess_id, pattern, group_start, group_end in zip(block[group_starts // num_answers].tolist(),
+                group_patterns[group_starts].tolist(), group_starts.tolist(), group_ends.tolist()):
+            yield (guess_id, pattern, group_end - group_start,
+                    '["' + '","'.join(group_answers[group_start:group_end]) + '"]')
+
+
+def export_sqlite(filename, score_table, guesses, answers, with_partitions=False):
+    '''
+    Export the words with their expected scores (see load_score_table), the letter frequencies of the answers,
+    and optionally the partitions of the answers by the feedback for each guess, to an indexed SQLite database.
+
+    Each guess is exported once (the first time it appears in the guesses), with its column in the score cache as
+    its id. The export_tables table records the source of each table (a key of the cached data and settings it was
+    written from), so that exporting again only rewrites the tables whose source has changed. If the partitions are
+    not exported this time, an existing partitions table is dropped if it is out of date, rather than left behind.
+    '''
+    import sqlite3
+    print(coloured(f"\nExporting to '{filename}'", attrs=['bold']))
+    columns = {guess_word: column for column, guess_word in reversed(list(enumerate(guesses)))}
+    ids = np.array(sorted(columns.values()), dtype=np.int64)
+    answer_set = set(answers)
+    db = sqlite3.connect(filename)
+    try:
+        db.execute('CREATE TABLE IF NOT EXISTS export_tables ' +
+                '(name TEXT PRIMARY KEY, source_key TEXT NOT NULL, num_rows INTEGER NOT NULL, exported_at TEXT)')
+        patterns_key = get_cache_key('feedback_patterns', guesses, answers)
+        if with_partitions and score_table.entropy is None:
+            partition_scores = get_all_partition_scores(guesses, answers)
+            score_table = score_table._replace(entropy=partition_scores['entropy'],
+                    expected_remaining=partition_scores['expected_remaining'],
+                    max_bucket=partition_scores['max_bucket'])
+        masks = get_letter_masks(score_table.codes)
+        sorted_codes = np.sort(score_table.codes, axis=1)
+        num_letters = 1 + np.count_nonzero(sorted_codes[:, 1:] != sorted_codes[:, :-1], axis=1)
+        score_columns = [masks, num_letters, score_table.greens, score_table.yellows, score_table.total,
+                score_table.greens * GREEN_MULTIPLIER + score_table.yellows]
+        if score_table.entropy is not None:
+            score_columns += [score_table.entropy, score_table.expected_remaining, score_table.max_bucket]
+        guess_words = [guesses[i] for i in ids.tolist()]
+        guess_rows = zip(ids.tolist(), guess_words, (int(guess_word in answer_set) for guess_word in guess_words),
+                *(np.asarray(column)[ids].tolist() for column in score_columns),
+                *([repeat(None)] * 3 if score_table.entropy is None else []))
+        # the weighted scores depend on the green multiplier, so the table is rewritten whenever it changes
+        guesses_key = hashlib.sha256((f"{get_cache_key('expected_guess_scores', guesses, answers)}\n" +
+                f"{GREEN_MULTIPLIER!r}\n{score_table.entropy is not None}").encode('utf-8')).hexdigest()
+        write_export_table(db, 'guesses', guesses_key, guess_rows)
+        write_export_table(db, 'letter_frequencies', get_cache_key('letter_frequencies', [], answers),
+                ((position, letter, log_frequency) for position, log_freqs in enumerate(get_letter_log_freqs(answers))
+                    for letter, log_frequency in sorted(log_freqs.items())))
+        green_counts, yellow_counts = get_pattern_hit_counts(WORD_LENGTH)
+        write_export_table(db, 'patterns', f"{WORD_LENGTH}",
+                ((pattern, decode_feedback(pattern), int(green_counts[pattern]), int(yellow_counts[pattern]))
+                    for pattern in range(3 ** WORD_LENGTH)))
+        if with_partitions:
+            patterns = get_all_feedback_patterns(guesses, answers)
+            write_export_table(db, 'partitions', patterns_key, iter_partition_rows(patterns, ids, answers))
+        else:
+            exported = db.execute("SELECT source_key FROM export_tables WHERE name = 'partitions'").fetchone()
+            if exported is not None and exported[0] != patterns_key:
+                with db:
+                    db.execute('DROP TABLE IF EXISTS partitions')
+                    db.execute("DELETE FROM export_tables WHERE name = 'partitions'")
+                print("Dropped table 'partitions' (out of date)")
+    finally:
+        db.close()
+
+
+def make_server_data(expected_guess_scores, answers):
+    '''
+    Prepare everything needed to answer queries (see answer_request), so that it only has to be done once.
+
+    The guesses are indexed in advance (see build_guess_index), so that the top guesses without some letters
+    can be found without sorting or scoring the guesses again.
+    '''
+    guesses = [guess.word for guess in expected_guess_scores]
+    answer_set = set(answers)
+    return ServerData(
+        answers,
+        expected_guess_scores,
+        {guess.word: guess for guess in expected_guess_scores},
+        get_letter_log_freqs(answers),
+        build_guess_index(expected_guess_scores),
+        np.array([guess_word in answer_set for guess_word in guesses], dtype=bool),
+        prepare_solver(guesses, answers),
+    )
+
+
+def format_guess_score(guess):
+    '''
+    Convert the expected score of a guess into a dictionary (for a query response),
+    with its score by the chosen metric.
+    '''
+    return {'word': guess.word, 'score': get_metric_value(guess),
+            'greens': guess.greens, 'yellows': guess.yellows, 'total': guess.total}
+
+
+def get_top_guesses(data, k, excluded_mask=0, only_answers=False, max_duplicates=None):
+    '''
+    Find the k best guesses by the chosen metric that do not use any of the excluded letters (given as a mask),
+    nor have more than max_duplicates duplicated letters (by default, as many as allowed by -d).
+    '''
+    if max_duplicates is None:
+        max_duplicates = MAX_DUPLICATE_GUESS_LETTERS
+    return [format_guess_score(guess) for guess in find_top_guesses(data.guess_index, 'ranking', k,
+            excluded_mask, max_duplicates, data.answer_flags if only_answers else None)]
+
+
+def query_top(data, k=PRINTING_NUM_WORDS, exclude='', only_answers=False, max_duplicates=None):
+    '''
+    Answer a query for the k best guesses by the chosen metric, without any of the excluded letters.
+    '''
+    return {'metric': METRIC,
+            'guesses': get_top_guesses(data, k, get_letters_mask(exclude), only_answers, max_duplicates)}
+
+
+def query_evaluate(data, guesses, k=PRINTING_NUM_WORDS, only_answers=False):
+    '''
+    Answer a query evaluating a sequence of planned guesses, with their combined expected score,
+    and the k best guesses to follow them that do not reuse any of their letters.
+    '''
+    scores = []
+    for guess_word in guesses:
+        guess_word = guess_word.lower()
+        if len(guess_word) != WORD_LENGTH or not set(guess_word) <= set(ALPHABET):
+            raise ValueError(f"guess '{guess_word}' should be {WORD_LENGTH} lowercase letters")
+        scores.append(data.scores_by_word.get(guess_word) or get_expected_guess_score(guess_word, data.answers))
+    num_groups, expected_remaining, identified = get_joint_partition_scores(
+            [[guess.word for guess in scores]], data.answers)
+    return {
+        'metric': METRIC,
+        'guesses': [dict(format_guess_score(guess), legal=guess.word in data.scores_by_word) for guess in scores],
+        'weighted_score': sum(get_weighted_score(guess) for guess in scores),
+        'greens': sum(guess.greens for guess in scores),
+        'yellows': sum(guess.yellows for guess in scores),
+        'total': sum(guess.total for guess in scores),
+        'groups': int(num_groups[0]),
+        'expected_remaining': float(expected_remaining[0]),
+        'identified': float(identified[0]),
+        'next': get_top_guesses(data, k, get_letters_mask(''.join(guesses)), only_answers),
+    }
+
+
+def query_optimal(data, letters=None, num_guesses=None, num_results=1, only_answers=False):
+    '''
+    Answer a query for the best combinations of guesses that use only the given letters (see -O), or any letters.
+    '''
+    letters = letters or ALPHABET
+    get_letters_mask(letters)
+    num_guesses = num_guesses or len(set(letters.lower())) // WORD_LENGTH
+    results, num_possible, num_letter_sets, visited, pruned = find_optimal_guess_combinations(
+            data.expected_guess_scores, letters.lower(), num_guesses, num_results=num_results,
+            limit_guesses_to=data.answers if only_answers else None)
+    return {
+        'combinations': [{'score': score, 'guesses': [guess.word for guess in guesses]} for score, guesses in results],
+        'num_guesses': num_possible,
+        'num_letter_sets': num_letter_sets,
+        'visited': visited,
+        'pruned': pruned,
+    }
+
+
+def query_solve(data, clues, k=PRINTING_NUM_WORDS, only_answers=False):
+    '''
+    Answer a query for the answers that remain after a sequence of clues (see solve), and the k best next guesses.
+
+    Each clue is either a 'guess:feedback' string or a pair of a guess and its feedback.
+    '''
+    clues = [clue.split(':') if isinstance(clue, str) else clue for clue in clues]
+    if not all(len(clue) == 2 for clue in clues):
+        raise ValueError("each clue should be a guess and its feedback")
+    candidates = get_bitset_indices(apply_clues(data.solver.index,
+            [(guess_word.lower(), parse_feedback(feedback)) for guess_word, feedback in clues]), data.solver.index.size)
+    allowed = get_allowed_guesses([guess.word for guess in data.expected_guess_scores],
+            set(data.answers) if only_answers else None)
+    next_guesses = get_best_next_guesses(data.expected_guess_scores, data.answers, data.solver, candidates, allowed,
+            k) if len(candidates) > 1 else []
+    return {
+        'metric': METRIC,
+        'remaining': len(candidates),
+        'candidates': [data.answers[answer] for answer in candidates.tolist()],
+        'next': [format_guess_score(guess) for guess in next_guesses],
+    }
+
+
+def query_letters(data):
+    '''
+    Answer a query for the letters of the alphabet, sorted by their frequency in the answers (anywhere in the word,
+    and then in each position).
+    '''
+    return {'letters': [''.join(letter for letter, _ in sorted(log_freqs.items(), key=itemgetter(1), reverse=True))
+            for log_freqs in data.letter_freqs]}
+
+
+SERVER_QUERIES = {
+    'evaluate': query_evaluate,
+    'letters': query_letters,
+    'optimal': query_optimal,
+    'solve': query_solve,
+    'top': query_top,
+}
+
+
+def answer_request(data, request):
+    '''
+    Answer a request, given as a dictionary with the name of the query, its arguments and an optional id.
+
+    The response holds the id of the request, and either the result of the query or a description of the error.
+    '''
+    request_id = request.get('id') if isinstance(request, dict) else None
+    if not isinstance(request, dict) or request.get('query') not in SERVER_QUERIES:
+        return {'id': request_id, 'error': f"query should be one of: {', '.join(SERVER_QUERIES)}"}
+    arguments = {name: value for name, value in request.items() if name not in ('id', 'query')}
+    try:
+        return {'id': request_id, 'result': SERVER_QUERIES[request['query']](data, **arguments)}
+    except Exception as e:
+        # a bad query should never stop the server from answering the others
+        return {'id': request_id, 'error': f"{type(e).__name__}: {e}"}
+
+
+def serve_stream(data, executor, lines, write):
+    '''
+    Answer the requests read from a stream of JSON lines, writing each response as a JSON line.
+
+    Each line holds a request, or a batch of requests (as a list) that is answered with a list of responses
+    in the same order. Requests (including those in batches) are answered concurrently by the executor, so
+    responses to separate lines may be written in any order. Returns once every request has been answered.
+    '''
+    from concurrent.futures import wait
+    write_lock = threading.Lock()
+    def send(response):
+        with write_lock:
+            write(json.dumps(response) + '\n')
+    def send_batch(futures, remaining, lock):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] > 0:
+                return
+        send([future.result() for future in futures])
+    pending = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            send({'id': None, 'error': f"invalid JSON: {e}"})
+            continue
+        if isinstance(request, list):
+            if len(request) == 0:
+                send([])
+                continue
+            futures = [executor.submit(answer_request, data, item) for item in request]
+            remaining, lock = [len(futures)], threading.Lock()
+            for future in futures:
+                future.add_done_callback(lambda _, futures=futures, remaining=remaining, lock=lock:
+                        send_batch(futures, remaining, lock))
+        else:
+            futures = [executor.submit(answer_request, data, request)]
+            futures[0].add_done_callback(lambda future: send(future.result()))
+        pending.extend(futures)
+    wait(pending)
+
+
+def serve(data, address):
+    '''
+    Answer queries (see serve_stream) on standard input and output (if the address is '-'), on a local TCP port
+    (if it is 'host:port') or on a Unix socket (otherwise), until interrupted or the input ends.
+
+    Every connection shares the same data, and the same pool of threads to answer requests.
+    '''
+    from concurrent.futures import ThreadPoolExecutor
+    import socketserver
+    with ThreadPoolExecutor(max_workers=SERVER_THREADS) as executor:
+        if address == '-':
+            print("Serving queries on standard input")
+            def write(text):
+                sys.__stdout__.write(text)
+                sys.__stdout__.flush()
+            serve_stream(data, executor, sys.stdin, write)
+            return
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                def write(text):
+                    self.wfile.write(text.encode('utf-8'))
+                    self.wfile.flush()
+                serve_stream(data, executor, (line.decode('utf-8') for line in self.rfile), write)
+
+        host, _, port = address.rpartition(':')
+        if port.isdigit():
+            socketserver.ThreadingTCPServer.allow_reuse_address = True
+            server = socketserver.ThreadingTCPServer((host or 'localhost', int(port)), RequestHandler)
+        else:
+            import stat
+            # a socket left behind by a server that did not shut down cleanly would stop this one from binding to it
+            if os.path.exists(address) and stat.S_ISSOCK(os.stat(address).st_mode):
+                os.remove(address)
+            server = socketserver.ThreadingUnixStreamServer(address, RequestHandler)
+        server.daemon_threads = True
+        print(f"Serving queries on {address}")
+        try:
+            with server:
+                server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if not port.isdigit() and os.path.exists(address):
+                os.remove(address)
+
+
+def run_statistics(args):
+    '''
+    Load the word data and scores, and then display the statistics (or run the mode) chosen by the arguments.
+
+    Each phase of the run is measured (see measure_phase).
+    '''
+    global ALPHABET, PLANNED_GUESSES
+    print(coloured(f"Wordle Statistics.", 'green', attrs=['bold']))
+    if PLANNED_GUESSES and not (args.seek_optimal_guesses or args.solve or args.decision_tree or
+            SIMULATION_STRATEGY):
+        print(f"Planned guesses: {' '.join(PLANNED_GUESSES)}")
+    
+    # load word data
+    print(coloured("\nLoading data", attrs=['bold']))
     print("Loading word lists")
-    answers = list(read_wordlist(ANSWERS_WORDLIST_FILE))
-    guesses = list(read_wordlist(LEGAL_GUESSES_WORDLIST_FILE)) + answers
-    expected_guess_scores = get_all_expected_guess_scores(guesses, answers)
+    with measure_phase('read_wordlists'):
+        answers = list(read_wordlist(ANSWERS_WORDLIST_FILE))
+        guesses = list(read_wordlist(LEGAL_GUESSES_WORDLIST_FILE)) + answers
+        try:
+            ALPHABET = get_alphabet(guesses)
+        except ValueError as e:
+            print(coloured(f"ERROR: {e}", 'red'))
+            return
+    # the report only looks up the best few guesses in the table, while everything else uses the scores of the
+    # guesses one by one, and only a report (with the weighted metric) can run without numpy
+    uses_guess_scores = SWEEP_MULTIPLIERS is not None or BATCH_FILE is not None or SERVER_ADDRESS is not None or \
+            SIMULATION_STRATEGY is not None or args.decision_tree or args.solve or args.seek_optimal_guesses
+    report_only = not uses_guess_scores and EXPORT_SQLITE_FILE is None
+    with measure_phase('load_scores'):
+        score_table = load_score_table(guesses, answers, as_memoryviews=report_only and METRIC == 'weighted')
+        if METRIC != 'weighted':
+            partition_scores = get_all_partition_scores(guesses, answers)
+            score_table = score_table._replace(entropy=partition_scores['entropy'],
+                    expected_remaining=partition_scores['expected_remaining'],
+                    max_bucket=partition_scores['max_bucket'])
+    expected_guess_scores = get_expected_scores(score_table) if uses_guess_scores else None
+    
+    # show how the best guesses change with the green multiplier
+    if SWEEP_MULTIPLIERS is not None:
+        with measure_phase('sweep_green_multipliers'):
+            sweep_green_multipliers(expected_guess_scores, SWEEP_MULTIPLIERS,
+                    limit_guesses_to=answers if args.only_guess_answers else None)
+        return
+    
+    # evaluate many sequences of planned guesses at once
+    if BATCH_FILE is not None:
+        with measure_phase('evaluate_batch'):
+            evaluate_guess_sequences(expected_guess_scores, answers, BATCH_FILE)
+        return
+    
+    # save the tables of scores (and feedback) for analysis with SQL
+    if EXPORT_SQLITE_FILE is not None:
+        with measure_phase('export_sqlite'):
+            export_sqlite(EXPORT_SQLITE_FILE, score_table, guesses, answers, with_partitions=args.export_partitions)
+        return
+    
+    # play a game for every answer, to see how well a strategy does
+    if SIMULATION_STRATEGY is not None:
+        with measure_phase('simulate_games'):
+            simulate_games(expected_guess_scores, guesses, answers, SIMULATION_STRATEGY, PLANNED_GUESSES,
+                    limit_guesses_to=set(answers) if args.only_guess_answers else None)
+        return
+    
+    # keep everything loaded, and answer queries about it
+    if SERVER_ADDRESS is not None:
+        with measure_phase('prepare_server'):
+            data = make_server_data(expected_guess_scores, answers)
+        with measure_phase('serve'):
+            serve(data, SERVER_ADDRESS)
+        return
+    
+    # build a complete strategy from an opening guess, and/or narrow down the answers from the feedback
+    # for each guess, instead of evaluating opening guesses
+    if args.decision_tree or args.solve:
+        limit_guesses_to = set(answers) if args.only_guess_answers else None
+        decision_tree = None
+        if args.decision_tree:
+            if PLANNED_GUESSES:
+                opener = PLANNED_GUESSES[0].partition(':')[0].lower()
+            else:
+                opener = max((guess for guess in expected_guess_scores
+                        if limit_guesses_to is None or guess.word in limit_guesses_to), key=get_ranking_score).word
+            if opener not in guesses:
+                print(coloured(f"ERROR: opening guess '{opener}' is not in the set of legal guesses", 'red'))
+                return
+            with measure_phase('decision_tree'):
+                decision_tree = get_decision_tree(guesses, answers, opener, limit_guesses_to=limit_guesses_to)
+            if not args.solve:
+                if decision_tree is not None:
+                    print_decision_tree(decision_tree)
+                return
+        with measure_phase('solve'):
+            solve(expected_guess_scores, answers, PLANNED_GUESSES, limit_guesses_to=limit_guesses_to,
+                    decision_tree=decision_tree['tree'] if decision_tree else None)
+        return
     
     # Try to determine what the optimal guesses would be within the given constraints
     if args.seek_optimal_guesses:
         allowed_letters = [letter for word in PLANNED_GUESSES for letter in word] if PLANNED_GUESSES else ALPHABET
-        PLANNED_GUESSES = seek_optimal_guesses_within_constraints(
-                expected_guess_scores,
-                allowed_letters,
-                limit_guesses_to=answers if args.only_guess_answers else None)
+        unknown_letters = set(allowed_letters) - set(ALPHABET)
+        if unknown_letters:
+            # the alphabet is only known once the wordlists have been read
+            print(coloured(f"ERROR: -O letters '{''.join(sorted(unknown_letters))}' are not used by any words", 'red'))
+            return
+        with measure_phase('seek_optimal_guesses'):
+            PLANNED_GUESSES = seek_optimal_guesses_within_constraints(
+                    expected_guess_scores,
+                    allowed_letters,
+                    limit_guesses_to=answers if args.only_guess_answers else None,
+                    num_guesses=NUM_OPTIMAL_GUESSES,
+                    num_results=NUM_OPTIMAL_RESULTS,
+                    joint_answers=answers if args.joint else None)
     
     # compute and print statistics about the answer words
-    letter_freqs_in_answers = [get_letter_log_freqs(answers, pos) for pos in [None, *range(0, WORD_LENGTH)]]
-    print_letters_by_frequency(letter_freqs_in_answers)
+    with measure_phase('letter_frequencies'):
+        letter_freqs_in_answers = get_letter_log_freqs(answers)
+    with measure_phase('print_letter_frequencies'):
+        print_letters_by_frequency(letter_freqs_in_answers)
     
     # compute and print statistics about the planned guesses
-    print_guesses_with_best_expected_scores(
-            expected_guess_scores,
-            answers,
-            limit_guesses_to=answers if args.only_guess_answers else None)
+    with measure_phase('print_report'):
+        print_guesses_with_best_expected_scores(
+                score_table,
+                answers,
+                limit_guesses_to=answers if args.only_guess_answers else None)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    wall_start, cpu_start = time.perf_counter(), get_cpu_time()
+    profiler = None
+    if CPROFILE_FILE:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    # when answering queries or writing batch results on standard output, everything else is displayed on
+    # standard error instead
+    with redirect_stdout(sys.stderr) if SERVER_ADDRESS == '-' or BATCH_FILE is not None else nullcontext():
+        try:
+            run_statistics(args)
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(CPROFILE_FILE)
+            report_run_metrics(time.perf_counter() - wall_start, get_cpu_time() - cpu_start)
     
 
 if __name__ == "__main__":
     main()
-    
\ No newline at end of file